@@ -0,0 +1,232 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import redis
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+# Seconds between checks that both tracking connections are still up (see ClientSideCache._watch)
+TRACKING_CHECK_INTERVAL = 1.0
+
+
+def estimate_size(value: Any) -> int:
+    """Rough in-process footprint of a cached value, used to enforce the memory bound."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class ClientSideCache:
+    """In-process LRU + TTL cache kept coherent with Redis through CLIENT TRACKING.
+
+    Entries are stored per Redis key (plus an optional variant, e.g. the fields or range that
+    were read), so a single invalidation message drops every cached view of that key. Until
+    start_tracking() succeeds, and from a break in the invalidation stream until the watchdog
+    re-enables tracking, get() always misses.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, float, int]]" = OrderedDict()
+        self._variants: Dict[str, set] = {}
+        self._bytes = 0
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._pubsub = None
+        self._worker = None
+        self._tracking_connection = None
+        self._watchdog = None
+        self._watchdog_stop = threading.Event()
+        self.tracking = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def start_tracking(self, r: redis.Redis, prefixes: List[str]) -> None:
+        """Subscribe to invalidation messages for every key under prefixes (BCAST mode).
+
+        A watchdog re-checks tracking every TRACKING_CHECK_INTERVAL seconds and re-enables it
+        (with a new redirect) when either connection was lost; until then get() always misses.
+        """
+        self._enable_tracking(r, prefixes)
+        self._watchdog_stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, args=(r, prefixes), name="cache-tracking", daemon=True)
+        self._watchdog.start()
+
+    def stop(self, r: redis.Redis) -> None:
+        if self._watchdog:
+            self._watchdog_stop.set()
+            self._watchdog.join()
+            self._watchdog = None
+        self._disable_tracking(r)
+
+    def _enable_tracking(self, r: redis.Redis, prefixes: List[str]) -> None:
+        self._pubsub = r.pubsub()
+        self._pubsub.execute_command("CLIENT", "ID")
+        redirect_id = self._pubsub.parse_response()
+        # A reconnect gives the pubsub connection a new client ID, and Redis silently drops
+        # invalidations for the old one (RESP2), so stop serving entries as soon as it happens
+        self._pubsub.connection.register_connect_callback(self._on_pubsub_reconnect)
+        self._pubsub.subscribe(**{INVALIDATE_CHANNEL: self._on_invalidate})
+        self._worker = self._pubsub.run_in_thread(sleep_time=0.1, daemon=True,
+                                                  exception_handler=self._on_tracking_error)
+
+        # Tracking state belongs to the connection that enabled it, so keep that one out of the pool
+        self._tracking_connection = r.connection_pool.get_connection()
+        args = ["CLIENT", "TRACKING", "ON", "REDIRECT", redirect_id, "BCAST"]
+        for prefix in prefixes:
+            args += ["PREFIX", prefix]
+        try:
+            self._tracking_connection.send_command(*args)
+            self._tracking_connection.read_response()
+        except redis.RedisError:
+            self._disable_tracking(r)
+            raise
+        self.tracking = True
+
+    def _disable_tracking(self, r: redis.Redis) -> None:
+        self.tracking = False
+        if self._worker:
+            self._worker.stop()
+            self._worker = None
+        if self._pubsub:
+            if self._pubsub.connection:
+                # The connection goes back to the pool; its later reconnects are not ours to handle
+                self._pubsub.connection.deregister_connect_callback(self._on_pubsub_reconnect)
+            self._pubsub.close()
+            self._pubsub = None
+        if self._tracking_connection:
+            r.connection_pool.release(self._tracking_connection)
+            self._tracking_connection.disconnect()
+            self._tracking_connection = None
+        self.clear()
+
+    def _tracking_healthy(self) -> bool:
+        """Whether the parked connection still has tracking on and its redirect target is connected."""
+        try:
+            self._tracking_connection.send_command("CLIENT", "TRACKINGINFO")
+            info = self._tracking_connection.read_response()
+        except redis.RedisError:
+            return False
+        # A reconnected tracking connection reports "off"; a lost redirect client "broken_redirect"
+        decode = self._tracking_connection.encoder.decode
+        fields = {decode(name, force=True): value for name, value in zip(info[::2], info[1::2])}
+        flags = [decode(flag, force=True) for flag in fields.get("flags", [])]
+        return "on" in flags and "broken_redirect" not in flags
+
+    def _watch(self, r: redis.Redis, prefixes: List[str]) -> None:
+        while not self._watchdog_stop.wait(TRACKING_CHECK_INTERVAL):
+            if self.tracking and self._tracking_healthy():
+                continue
+            self._disable_tracking(r)
+            try:
+                self._enable_tracking(r, prefixes)
+                print("Client-side cache re-enabled with a new invalidation stream.")
+            except redis.RedisError as e:
+                print(f"Client-side cache still disabled, re-enabling tracking failed: {e}")
+
+    def _on_invalidate(self, message: Dict[str, Any]) -> None:
+        keys = message.get("data")
+        if keys is None:
+            # FLUSHDB / FLUSHALL
+            self.clear()
+        else:
+            self.invalidate(keys)
+
+    def _on_pubsub_reconnect(self, connection) -> None:
+        if self._pubsub and connection is self._pubsub.connection:
+            print("Client-side cache disabled, invalidation connection reconnected.")
+            self.tracking = False
+            self.clear()
+
+    def _on_tracking_error(self, error: Exception, pubsub, worker) -> None:
+        # Without the invalidation stream cached entries may go stale, so stop serving them
+        worker.stop()
+        if worker is not self._worker:
+            # A worker the watchdog already replaced
+            return
+        print(f"Client-side cache disabled, invalidation stream failed: {error}")
+        self.tracking = False
+        self.clear()
+
+    @property
+    def epoch(self) -> int:
+        """Snapshot to pass to set(); fills that raced with an invalidation are dropped."""
+        return self._epoch
+
+    def get(self, key: str, variant: Hashable = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get((key, variant)) if self.tracking else None
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._remove((key, variant))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end((key, variant))
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, variant: Hashable = None, epoch: Optional[int] = None) -> None:
+        size = estimate_size(value)
+        with self._lock:
+            if not self.tracking or (epoch is not None and epoch != self._epoch) or size > self.max_bytes:
+                return
+            if (key, variant) in self._entries:
+                self._remove((key, variant))
+            self._entries[(key, variant)] = (value, time.monotonic() + self.ttl, size)
+            self._variants.setdefault(key, set()).add(variant)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, keys: List[str]) -> None:
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                for variant in self._variants.get(key, set()).copy():
+                    self._remove((key, variant))
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._variants.clear()
+            self._bytes = 0
+
+    def _remove(self, entry_key: Tuple[str, Hashable]) -> None:
+        _, _, size = self._entries.pop(entry_key)
+        self._bytes -= size
+        variants = self._variants[entry_key[0]]
+        variants.discard(entry_key[1])
+        if not variants:
+            del self._variants[entry_key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "tracking": self.tracking,
+            }
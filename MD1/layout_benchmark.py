@@ -0,0 +1,90 @@
+import copy
+import random
+import time
+from typing import Any, Dict, List
+
+import redis
+
+from layouts import LAYOUTS, PACKED_LISTPACK_VALUE, active_layout, use_layout
+from md1 import connect_to_redis, hydrate, import_movie_data, load_json, reclaim_namespace
+
+# Copies of the sample catalog to import per layout, and hydrate calls timed per query shape
+SCALE = 50
+QUERY_ROUNDS = 200
+QUERY_BATCH = 10
+
+
+def scaled_movies(movies: List[Dict[str, Any]], scale: int) -> List[Dict[str, Any]]:
+    scaled = []
+    for copy_no in range(scale):
+        for movie in movies:
+            movie = copy.deepcopy(movie)
+            movie["id"] = str(int(movie["id"]) + copy_no * 100000)
+            if copy_no:
+                movie["title"] = f"{movie['title']} ({copy_no})"
+            scaled.append(movie)
+    return scaled
+
+def memory_per_entity(r: redis.Redis, key_prefix: str, ids: List[str]) -> float:
+    """MEMORY USAGE of the active layout's storage keys, amortized over the entities they hold."""
+    layout = active_layout()
+    keys = sorted({layout.storage_key(key_prefix, entity_id) for entity_id in ids})
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key, samples=0)
+    return sum(usage or 0 for usage in pipe.execute()) / len(ids)
+
+def listpack_limits(r: redis.Redis) -> Dict[str, str]:
+    """The server's hash listpack thresholds, or an empty dict where CONFIG is not allowed."""
+    try:
+        return r.config_get("hash-max-listpack-*")
+    except redis.ResponseError:
+        return {}
+
+def hydrate_latency_ms(r: redis.Redis, key_prefix: str, ids: List[str], fields: List[str] = None) -> float:
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(QUERY_ROUNDS):
+        hydrate(r, key_prefix, rng.sample(ids, QUERY_BATCH), fields)
+    return (time.perf_counter() - start) * 1000 / QUERY_ROUNDS
+
+def main():
+    r = connect_to_redis()
+    if not r:
+        return
+
+    movies = scaled_movies(load_json(filename="in_import_data.json").get("movies", []), SCALE)
+    ids = [movie["id"] for movie in movies]
+
+    results = []
+    for name in LAYOUTS:
+        ns = f"bench:{name}:"
+        use_layout(name)
+        print(f"\n>>> Layout '{name}'")
+        import_movie_data(r, {"movies": copy.deepcopy(movies)}, ns=ns)
+        results.append({
+            "layout": name,
+            "bytes_per_movie": memory_per_entity(r, f"{ns}movie", ids),
+            # Checks that the layout keeps the memory-efficient encoding it is designed for
+            "encoding": r.object("encoding", active_layout().storage_key(f"{ns}movie", ids[0])),
+            "full_ms": hydrate_latency_ms(r, f"{ns}movie", ids),
+            "title_ms": hydrate_latency_ms(r, f"{ns}movie", ids, ["title"]),
+        })
+        reclaim_namespace(r, ns)
+
+    print(f"\n{len(movies)} movies, {QUERY_ROUNDS} hydrate calls of {QUERY_BATCH} ids per query shape")
+    limits = listpack_limits(r)
+    print("Server listpack limits: " + (", ".join(f"{k}={v}" for k, v in sorted(limits.items())) or "unknown"))
+    if int(limits.get("hash-max-listpack-value", PACKED_LISTPACK_VALUE)) < PACKED_LISTPACK_VALUE:
+        print(f"Packed buckets need hash-max-listpack-value >= {PACKED_LISTPACK_VALUE} to stay listpack-encoded.")
+    print("Layout\tEncoding\tBytesPerMovie\tFullHydrateMs\tTitleHydrateMs")
+    for row in results:
+        print(f"{row['layout']}\t{row['encoding']}\t{row['bytes_per_movie']:.1f}\t{row['full_ms']:.3f}\t"
+              f"{row['title_ms']:.3f}")
+
+    use_layout("hash")
+    r.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+# Short field names used by the compact layouts; fields missing here keep their own name
+FIELD_CODES = {
+    "id": "i",
+    "title": "t",
+    "year": "y",
+    "runtime": "rt",
+    "genre": "g",
+    "director_id": "d",
+    "rating": "r",
+    "votes": "v",
+    "revenue": "rv",
+    "budget": "b",
+    "name": "n",
+    "birth_year": "by",
+    "nationality": "na",
+    "awards": "aw",
+}
+
+# Entities per shared hash in the packed layout, below the default hash-max-listpack-entries (128)
+PACKED_BUCKET_SIZE = 100
+# Packed movie blobs are 121-171 bytes on the sample data, above the default hash-max-listpack-value (64); the server needs
+# at least this much or every bucket is converted to a hashtable and the layout saves nothing
+PACKED_LISTPACK_VALUE = 256
+
+
+def stringify(record: Dict[str, Any]) -> Dict[str, str]:
+    """Render values the way redis-py does on HSET, so every layout decodes to the same strings."""
+    return {field: value if isinstance(value, str) else repr(value) for field, value in record.items()}
+
+
+class HashLayout:
+    """One hash per entity, one hash field per attribute (the original MD1 layout)."""
+
+    name = "hash"
+    packed = False
+    codes: Dict[str, str] = {}
+
+    def storage_key(self, key_prefix: str, entity_id: str) -> str:
+        return f"{key_prefix}:{entity_id}"
+
+    def storage_field(self, entity_id: str) -> Optional[str]:
+        return None
+
+    def encode(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return {self.codes.get(field, field): value for field, value in record.items()}
+
+    def decode(self, stored: Dict[str, str]) -> Dict[str, str]:
+        names = {code: field for field, code in self.codes.items()}
+        return {names.get(code, code): value for code, value in stored.items()}
+
+    def write(self, pipe, key_prefix: str, entity_id: str, record: Dict[str, Any]) -> None:
+        pipe.hset(self.storage_key(key_prefix, entity_id), mapping=self.encode(record))
+
+    def queue_read(self, pipe, key_prefix: str, entity_id: str, fields: List[str] = None) -> None:
+        key = self.storage_key(key_prefix, entity_id)
+        if fields:
+            pipe.hmget(key, [self.codes.get(field, field) for field in fields])
+        else:
+            pipe.hgetall(key)
+
+    def parse_read(self, raw: Any, fields: List[str] = None) -> Dict[str, str]:
+        if fields:
+            return {field: value for field, value in zip(fields, raw) if value is not None}
+        return self.decode(raw)
+
+    def storage_item(self, key_prefix: str, entity_id: str) -> Dict[str, str]:
+        """Where the server-side scripts find an entity."""
+        item = {"key": self.storage_key(key_prefix, entity_id)}
+        field = self.storage_field(entity_id)
+        if field is not None:
+            item["field"] = field
+        return item
+
+    def lua_spec(self) -> str:
+        return json.dumps({"packed": self.packed, "codes": self.codes})
+
+
+class CompactHashLayout(HashLayout):
+    """One hash per entity with short field codes, keeping small hashes listpack-encoded and cheap."""
+
+    name = "compact"
+    codes = FIELD_CODES
+
+
+class PackedLayout(HashLayout):
+    """Entities packed as compact JSON blobs, PACKED_BUCKET_SIZE of them per shared hash.
+
+    Blobs are JSON rather than msgpack because MD1 clients run with decode_responses=True.
+    Requires hash-max-listpack-value >= PACKED_LISTPACK_VALUE on the server.
+    """
+
+    name = "packed"
+    packed = True
+    codes = FIELD_CODES
+
+    def storage_key(self, key_prefix: str, entity_id: str) -> str:
+        entity_id = str(entity_id)
+        bucket = int(entity_id) // PACKED_BUCKET_SIZE if entity_id.isdigit() else zlib.crc32(entity_id.encode()) % 1024
+        return f"{key_prefix}:b:{bucket}"
+
+    def storage_field(self, entity_id: str) -> Optional[str]:
+        return str(entity_id)
+
+    def write(self, pipe, key_prefix: str, entity_id: str, record: Dict[str, Any]) -> None:
+        blob = json.dumps(self.encode(stringify(record)), separators=(",", ":"), ensure_ascii=False)
+        pipe.hset(self.storage_key(key_prefix, entity_id), self.storage_field(entity_id), blob)
+
+    def queue_read(self, pipe, key_prefix: str, entity_id: str, fields: List[str] = None) -> None:
+        pipe.hget(self.storage_key(key_prefix, entity_id), self.storage_field(entity_id))
+
+    def parse_read(self, raw: Any, fields: List[str] = None) -> Dict[str, str]:
+        if raw is None:
+            return {}
+        record = self.decode(json.loads(raw))
+        if fields:
+            return {field: record[field] for field in fields if field in record}
+        return record
+
+
+LAYOUTS = {layout.name: layout for layout in (HashLayout(), CompactHashLayout(), PackedLayout())}
+
+_active = LAYOUTS[HashLayout.name]
+
+
+def active_layout() -> HashLayout:
+    return _active
+
+def use_layout(name: str) -> HashLayout:
+    global _active
+    _active = LAYOUTS[name]
+    return _active
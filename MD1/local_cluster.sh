@@ -0,0 +1,39 @@
+#!/usr/bin/env bash
+# Local 3-primary / 3-replica Redis Cluster for md1_cluster.py.
+# Usage: ./local_cluster.sh start|stop   (reads REDIS_PASSWORD from the environment or ../.env)
+set -euo pipefail
+
+PORTS="7000 7001 7002 7003 7004 7005"
+DATA_DIR="${CLUSTER_DIR:-/tmp/md1-cluster}"
+
+if [ -z "${REDIS_PASSWORD:-}" ] && [ -f "$(dirname "$0")/../.env" ]; then
+  REDIS_PASSWORD="$(grep -E '^REDIS_PASSWORD=' "$(dirname "$0")/../.env" | cut -d= -f2-)"
+fi
+: "${REDIS_PASSWORD:?REDIS_PASSWORD must be set}"
+
+case "${1:-}" in
+  start)
+    nodes=""
+    for port in $PORTS; do
+      mkdir -p "$DATA_DIR/$port"
+      redis-server --port "$port" --dir "$DATA_DIR/$port" --daemonize yes \
+        --cluster-enabled yes --cluster-config-file nodes.conf --cluster-node-timeout 5000 \
+        --appendonly no --requirepass "$REDIS_PASSWORD" --masterauth "$REDIS_PASSWORD"
+      nodes="$nodes 127.0.0.1:$port"
+    done
+    sleep 1
+    # shellcheck disable=SC2086
+    redis-cli -a "$REDIS_PASSWORD" --no-auth-warning --cluster create $nodes --cluster-replicas 1 --cluster-yes
+    echo "Cluster up; set REDIS_HOST=127.0.0.1 REDIS_PORT=7000 REDIS_USER=default"
+    ;;
+  stop)
+    for port in $PORTS; do
+      redis-cli -p "$port" -a "$REDIS_PASSWORD" --no-auth-warning shutdown nosave || true
+    done
+    rm -rf "$DATA_DIR"
+    ;;
+  *)
+    echo "Usage: $0 start|stop" >&2
+    exit 1
+    ;;
+esac
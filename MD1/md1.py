@@ -1,8 +1,46 @@
 import redis
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple
 import json
 import os
+import time
+import threading
+import re
 from dotenv import load_dotenv
+from redis.cluster import RedisCluster
+
+from layouts import active_layout, stringify, use_layout
+
+IMPORT_CHUNK_SIZE = 500
+UPDATE_BATCH_SIZE = 200
+DELETE_BATCH_SIZE = 200
+RECLAIM_SCAN_COUNT = 1000
+FILTERED_TOP_N_TTL = 60
+
+REVENUE_KEY = "boxoffice:revenue"
+RATING_KEY = "top:rated"
+TITLE_INDEX_KEY = "idx:title"
+TITLE_PREFIX_INDEX_KEY = "idx:title:lex"
+YEAR_INDEX_KEY = "idx:year"
+# Set of the tmp:top:* results filtered_leaderboard has materialized, dropped by every update and delete
+FILTERED_TOP_N_RESULTS_KEY = "tmp:top:results"
+# Name of the storage layout (see layouts.py) a generation was imported with
+LAYOUT_KEY = "meta:layout"
+
+# Leaderboards available to the top-N queries, globally and per genre as genre:{g}:{metric}
+METRIC_KEYS = {"revenue": REVENUE_KEY, "rating": RATING_KEY}
+
+# Hash key prefix of each entity that carries an award index
+AWARD_ENTITY_KEYS = {"actor": "actors", "director": "director"}
+
+# Every data key lives under a "v{N}:" namespace; this pointer names the generation readers should use
+GENERATION_KEY = "md1:generation"
+NEXT_GENERATION_KEY = "md1:generation:next"
+# Held by the running import (value: its generation). An importer that dies keeps it until it expires,
+# after which the next import reclaims the generation it left behind.
+IMPORT_LOCK_KEY = "md1:import-lock"
+IMPORT_LOCK_TTL_MS = 60 * 60 * 1000
+# Keys written before versioned namespaces existed, reclaimed when the first generation goes live
+LEGACY_KEY_PATTERNS = ["movie:*", "director:*", "actors:*", "genre:*", "award:*", "idx:*", REVENUE_KEY, RATING_KEY]
 
 def connect_to_redis():
     """Connect to Redis (adjust host/port as needed)"""
@@ -45,103 +83,565 @@ def load_json(filename="data.json"):
         print(f"Error decoding JSON from file {filename}.")
         raise
 
-def import_movie_data(r: redis.Redis, json_data: List[Dict[str, Any]]) -> None:
-    for movie in json_data.get("movies", []):
-        movie_id = movie.get("id")
-        if 'id' in movie:
-            r.hset(f"movie:{movie_id}", mapping=movie)
-        if 'revenue' in movie:
-            r.zadd("boxoffice:revenue", {movie_id: movie['revenue']})
-        if 'rating' in movie:
-            r.zadd("top:rated", {movie_id: movie['rating']})
-        if 'genre' in movie:
-            r.sadd(f"genre:{movie['genre']}", movie_id)
-    print(f"Imported {len(json_data.get('movies', []))} movies into Redis.")
-
-def import_director_data(r: redis.Redis, json_data: List[Dict[str, Any]]) -> None:
-    for director in json_data.get("directors", []):
-        director_id = director.get("id")
-        if director.get("awards"):
-            director["awards"] = ', '.join(director.get("awards"))
-        if director_id:
-            r.hset(f"director:{director_id}", mapping=director)
-    print(f"Imported {len(json_data.get('directors', []))} directors into Redis.")
-
-def import_actor_data(r: redis.Redis, json_data: List[Dict[str, Any]]) -> None:
-    for actor in json_data.get("actors", []):
-        actor_id = actor.get("id")
-        if actor.get("awards"):
-            actor["awards"] = ', '.join(actor.get("awards"))
-        if actor_id:
-            r.hset(f"actors:{actor_id}", mapping=actor)
-    print(f"Imported {len(json_data.get('actors', []))} actors into Redis.")
-
-def update_movie_data(r: redis.Redis, json_data: List[Dict[str, Any]]) -> None:
-    for movie in json_data.get("movies", []):
-        movie_id = movie.get("id")
-        r.hset(f"movie:{movie_id}", mapping=movie)
-        if 'revenue' in movie:
-            r.zadd("boxoffice:revenue", {movie_id: movie['revenue']})
-        if 'rating' in movie:
-            r.zadd("top:rated", {movie_id: movie['rating']})
-        if 'genre' in movie:
-            r.sadd(f"genre:{movie['genre']}", movie_id)
-        # print(f"Updated movie {movie_id} with data: {movie}")
-    print(f"Updated {len(json_data.get('movies', []))} movies in Redis.")
-
-def delete_movie_data(r: redis.Redis, json_data: List[Dict[str, Any]]) -> None:
-    for movie in json_data.get("movies", []):
-        movie_id = movie.get("id")
-        r.zrem("boxoffice:revenue", movie_id)
-        r.zrem("top:rated", movie_id)
-        genre = r.hget(f"movie:{movie_id}", "genre")
-        r.srem(f"genre:{genre}", movie_id)
-        r.delete(f"movie:{movie_id}")
-    print(f"Deleted {len(json_data.get('movies', []))} movies from Redis.")
-
-def select_movie_data_by_name(r: redis.Redis, movie_name: List[str]) -> None:
-    movie_id = r.scan_iter(f"movie:*")
-    for mid in movie_id:
-        movie = r.hgetall(mid)
-        if movie.get("title") in movie_name:
-            print(f"\nMovie Data for '{movie.get("title")}':")
-            for(key, value) in movie.items():
-                print(f"{key}: {value}")
-
-def select_top_n_movies_by_revenue(r: redis.Redis, order: str , n: int) -> None:
+def generation_namespace(generation) -> str:
+    return f"v{generation}:" if generation else ""
+
+def active_namespace(r: redis.Redis) -> str:
+    """Key prefix of the generation readers should currently use ("" for pre-versioning data)."""
+    return generation_namespace(r.get(GENERATION_KEY))
+
+def resolve_namespace(r: redis.Redis, ns: Optional[str]) -> str:
+    """ns, or the active generation's namespace when the caller did not name one."""
+    return active_namespace(r) if ns is None else ns
+
+def allocate_generation(r: redis.Redis) -> Optional[int]:
+    """Reserve the next generation and take the import lock for it; None while another import holds the lock."""
+    generation = r.incr(NEXT_GENERATION_KEY)
+    if not r.set(IMPORT_LOCK_KEY, generation, nx=True, px=IMPORT_LOCK_TTL_MS):
+        return None
+    return generation
+
+RELEASE_IMPORT_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def release_import_lock(r: redis.Redis, generation: int) -> None:
+    # Only the holder releases: after an expiry the lock may already belong to the next import
+    r.register_script(RELEASE_IMPORT_LOCK_LUA)(keys=[IMPORT_LOCK_KEY], args=[generation])
+
+def activate_generation(r: redis.Redis, generation: int) -> None:
+    """Atomically point readers at a fully imported generation, then release the import lock."""
+    r.set(GENERATION_KEY, generation)
+    release_import_lock(r, generation)
+
+def reclaim_namespace(r: redis.Redis, ns: str, count: int = RECLAIM_SCAN_COUNT) -> int:
+    """SCAN a retired generation and UNLINK its keys in batches, so the server frees them asynchronously."""
+    patterns = [f"{ns}*"] if ns else LEGACY_KEY_PATTERNS
+    reclaimed = 0
+    for pattern in patterns:
+        batch = []
+        for key in r.scan_iter(match=pattern, count=count):
+            batch.append(key)
+            if len(batch) >= count:
+                reclaimed += r.unlink(*batch)
+                batch = []
+        if batch:
+            reclaimed += r.unlink(*batch)
+    return reclaimed
+
+def reclaim_orphaned_generations(r: redis.Redis, generation: int, count: int = RECLAIM_SCAN_COUNT) -> int:
+    """UNLINK the keys of generations between the active one and generation, left by imports that never finished.
+
+    Only call this while holding the import lock for generation, so no other import is writing them.
+    """
+    active = int(r.get(GENERATION_KEY) or 0)
+    reclaimed = 0
+    batch = []
+    for key in r.scan_iter(match="v*:*", count=count):
+        orphan = key.split(":", 1)[0][1:]
+        if orphan.isdigit() and active < int(orphan) < generation:
+            batch.append(key)
+            if len(batch) >= count:
+                reclaimed += r.unlink(*batch)
+                batch = []
+    if batch:
+        reclaimed += r.unlink(*batch)
+    return reclaimed
+
+def reclaim_namespace_in_background(r: redis.Redis, ns: str) -> threading.Thread:
+    def run():
+        reclaimed = reclaim_namespace(r, ns)
+        print(f"\nReclaimed {reclaimed} keys from retired namespace '{ns}'.")
+    thread = threading.Thread(target=run, name=f"reclaim-{ns or 'legacy'}")
+    thread.start()
+    return thread
+
+def pipelined_import(r: redis.Redis, records: List[Dict[str, Any]],
+                     write_record: Callable[[redis.client.Pipeline, Dict[str, Any], str], None],
+                     chunk_size: int = IMPORT_CHUNK_SIZE, ns: Optional[str] = None) -> Dict[str, Any]:
+    """Queue write_record() for each record on a non-transactional pipeline, flushing every chunk_size records."""
+    ns = resolve_namespace(r, ns)
+    start = time.perf_counter()
+    round_trips = 0
+    pipe = r.pipeline(transaction=False)
+    for i in range(0, len(records), chunk_size):
+        for record in records[i:i + chunk_size]:
+            write_record(pipe, record, ns)
+        pipe.execute()
+        round_trips += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "records": len(records),
+        "round_trips": round_trips,
+        "seconds": elapsed,
+        "records_per_sec": len(records) / elapsed if elapsed > 0 else 0.0,
+    }
+
+def print_import_stats(description: str, stats: Dict[str, Any]) -> None:
+    print(f"Imported {stats['records']} {description} into Redis "
+          f"({stats['records_per_sec']:.0f} records/sec, {stats['round_trips']} round trips).")
+
+def fold_title(title: str) -> str:
+    # ASCII-only lowercasing, matching Lua's string.lower() in the update script
+    return title.encode("utf-8").lower().decode("utf-8")
+
+def title_prefix_member(movie_id: str, title: str) -> str:
+    return f"{fold_title(title)}\x00{movie_id}"
+
+def index_title(r: redis.Redis, movie_id: str, title: str, ns: str) -> None:
+    r.hset(f"{ns}{TITLE_INDEX_KEY}", title, movie_id)
+    r.zadd(f"{ns}{TITLE_PREFIX_INDEX_KEY}", {title_prefix_member(movie_id, title): 0})
+
+def write_movie(pipe: redis.client.Pipeline, movie: Dict[str, Any], ns: str) -> None:
+    movie_id = movie.get("id")
+    if 'id' in movie:
+        active_layout().write(pipe, f"{ns}movie", movie_id, movie)
+    if 'revenue' in movie:
+        pipe.zadd(f"{ns}{REVENUE_KEY}", {movie_id: movie['revenue']})
+    if 'rating' in movie:
+        pipe.zadd(f"{ns}{RATING_KEY}", {movie_id: movie['rating']})
+    if 'genre' in movie:
+        pipe.sadd(f"{ns}genre:{movie['genre']}", movie_id)
+        for metric in METRIC_KEYS:
+            if metric in movie:
+                pipe.zadd(f"{ns}genre:{movie['genre']}:{metric}", {movie_id: movie[metric]})
+    if 'year' in movie:
+        pipe.zadd(f"{ns}{YEAR_INDEX_KEY}", {movie_id: movie['year']})
+    if 'director_id' in movie:
+        pipe.sadd(f"{ns}director:{movie['director_id']}:movies", movie_id)
+    if 'title' in movie:
+        index_title(pipe, movie_id, movie['title'], ns)
+
+def normalize_award(award: str) -> str:
+    return " ".join(award.lower().split())
+
+def award_key(entity: str, award: str, ns: str) -> str:
+    return f"{ns}award:{entity}:{normalize_award(award)}"
+
+def index_awards(pipe: redis.client.Pipeline, entity: str, entity_id: str, awards: List[str], ns: str) -> None:
+    for award in awards:
+        pipe.sadd(award_key(entity, award, ns), entity_id)
+
+def write_director(pipe: redis.client.Pipeline, director: Dict[str, Any], ns: str) -> None:
+    director_id = director.get("id")
+    if director_id and isinstance(director.get("awards"), list):
+        index_awards(pipe, "director", director_id, director["awards"], ns)
+    if director.get("awards"):
+        director["awards"] = ', '.join(director.get("awards"))
+    if director_id:
+        active_layout().write(pipe, f"{ns}director", director_id, director)
+
+def write_actor(pipe: redis.client.Pipeline, actor: Dict[str, Any], ns: str) -> None:
+    actor_id = actor.get("id")
+    if actor_id and isinstance(actor.get("awards"), list):
+        index_awards(pipe, "actor", actor_id, actor["awards"], ns)
+    if actor.get("awards"):
+        actor["awards"] = ', '.join(actor.get("awards"))
+    if actor_id:
+        active_layout().write(pipe, f"{ns}actors", actor_id, actor)
+
+def import_movie_data(r: redis.Redis, json_data: List[Dict[str, Any]], chunk_size: int = IMPORT_CHUNK_SIZE,
+                      ns: Optional[str] = None) -> None:
+    stats = pipelined_import(r, json_data.get("movies", []), write_movie, chunk_size, ns)
+    print_import_stats("movies", stats)
+
+def import_director_data(r: redis.Redis, json_data: List[Dict[str, Any]], chunk_size: int = IMPORT_CHUNK_SIZE,
+                         ns: Optional[str] = None) -> None:
+    stats = pipelined_import(r, json_data.get("directors", []), write_director, chunk_size, ns)
+    print_import_stats("directors", stats)
+
+def import_actor_data(r: redis.Redis, json_data: List[Dict[str, Any]], chunk_size: int = IMPORT_CHUNK_SIZE,
+                      ns: Optional[str] = None) -> None:
+    stats = pipelined_import(r, json_data.get("actors", []), write_actor, chunk_size, ns)
+    print_import_stats("actors", stats)
+
+# Shared by the update and delete scripts: ARGV[2] describes the active layout (see layouts.lua_spec).
+# Only the fixed indexes are declared in KEYS; the record, genre and director keys depend on the stored movie
+# and are built in Lua from the namespace in ARGV[1], and the filtered results to drop are read from KEYS[6].
+# Every one of them starts with that namespace, so on Redis Cluster they stay in the slot of KEYS only if
+# the namespace carries a hash tag (check_script_namespace).
+STORAGE_LUA = """
+local storage = cjson.decode(ARGV[2])
+local names = {}
+for field, code in pairs(storage['codes']) do
+    names[code] = field
+end
+
+local function read_record(item)
+    local record = {}
+    if storage['packed'] then
+        local blob = redis.call('HGET', item['key'], item['field'])
+        if blob then
+            for code, value in pairs(cjson.decode(blob)) do
+                record[names[code] or code] = value
+            end
+        end
+    else
+        local flat = redis.call('HGETALL', item['key'])
+        for j = 1, #flat, 2 do
+            record[names[flat[j]] or flat[j]] = flat[j + 1]
+        end
+    end
+    return record
+end
+
+-- Materialized filtered leaderboards may rank changed or deleted movies; drop them all (KEYS[6])
+local function drop_filtered_results()
+    for _, key in ipairs(redis.call('SMEMBERS', KEYS[6])) do
+        redis.call('UNLINK', key)
+    end
+    redis.call('UNLINK', KEYS[6])
+end
+"""
+
+def check_script_namespace(r: redis.Redis, ns: str) -> None:
+    """Refuse to run the update/delete scripts on a cluster unless ns pins every key they build to one slot."""
+    if isinstance(r, RedisCluster) and not re.search(r"{[^}]+}", ns):
+        raise ValueError(f"Namespace '{ns}' has no hash tag; on Redis Cluster use md1_cluster's per-shard namespaces.")
+
+UPDATE_MOVIES_LUA = STORAGE_LUA + """
+local ns = ARGV[1]
+local changed = 0
+for i = 3, #ARGV do
+    local item = cjson.decode(ARGV[i])
+    local movie = item['movie']
+    local id = movie['id']
+    local old = read_record(item)
+
+    local fields = {}
+    local merged = {}
+    for field, value in pairs(old) do
+        merged[storage['codes'][field] or field] = value
+    end
+    for field, value in pairs(movie) do
+        if old[field] ~= value then
+            table.insert(fields, storage['codes'][field] or field)
+            table.insert(fields, value)
+            merged[storage['codes'][field] or field] = value
+        end
+    end
+    if #fields > 0 then
+        if storage['packed'] then
+            redis.call('HSET', item['key'], item['field'], cjson.encode(merged))
+        else
+            redis.call('HSET', item['key'], unpack(fields))
+        end
+        changed = changed + #fields / 2
+    end
+
+    if movie['revenue'] then
+        redis.call('ZADD', KEYS[1], movie['revenue'], id)
+    end
+    if movie['rating'] then
+        redis.call('ZADD', KEYS[2], movie['rating'], id)
+    end
+    if movie['genre'] and movie['genre'] ~= old['genre'] then
+        if old['genre'] then
+            redis.call('SREM', ns .. 'genre:' .. old['genre'], id)
+            redis.call('ZREM', ns .. 'genre:' .. old['genre'] .. ':revenue', id)
+            redis.call('ZREM', ns .. 'genre:' .. old['genre'] .. ':rating', id)
+        end
+        redis.call('SADD', ns .. 'genre:' .. movie['genre'], id)
+    end
+    local genre = movie['genre'] or old['genre']
+    if genre then
+        local revenue = movie['revenue'] or old['revenue']
+        local rating = movie['rating'] or old['rating']
+        if revenue then
+            redis.call('ZADD', ns .. 'genre:' .. genre .. ':revenue', revenue, id)
+        end
+        if rating then
+            redis.call('ZADD', ns .. 'genre:' .. genre .. ':rating', rating, id)
+        end
+    end
+    if movie['year'] then
+        redis.call('ZADD', KEYS[5], movie['year'], id)
+    end
+    if movie['director_id'] and movie['director_id'] ~= old['director_id'] then
+        if old['director_id'] then
+            redis.call('SREM', ns .. 'director:' .. old['director_id'] .. ':movies', id)
+        end
+        redis.call('SADD', ns .. 'director:' .. movie['director_id'] .. ':movies', id)
+    end
+    if movie['title'] and movie['title'] ~= old['title'] then
+        if old['title'] then
+            if redis.call('HGET', KEYS[3], old['title']) == id then
+                redis.call('HDEL', KEYS[3], old['title'])
+            end
+            redis.call('ZREM', KEYS[4], string.lower(old['title']) .. '\\0' .. id)
+        end
+        redis.call('HSET', KEYS[3], movie['title'], id)
+        redis.call('ZADD', KEYS[4], 0, string.lower(movie['title']) .. '\\0' .. id)
+    end
+end
+drop_filtered_results()
+return changed
+"""
+
+def encode_movie(movie: Dict[str, Any], ns: str) -> str:
+    # Values are stringified the way redis-py does on HSET so the script can compare them with stored fields
+    return json.dumps({**active_layout().storage_item(f"{ns}movie", movie["id"]), "movie": stringify(movie)})
+
+def movie_index_keys(ns: str) -> List[str]:
+    return [f"{ns}{key}" for key in (REVENUE_KEY, RATING_KEY, TITLE_INDEX_KEY, TITLE_PREFIX_INDEX_KEY, YEAR_INDEX_KEY,
+                                     FILTERED_TOP_N_RESULTS_KEY)]
+
+def update_movies(r: redis.Redis, movies: List[Dict[str, Any]], batch_size: int = UPDATE_BATCH_SIZE,
+                  ns: Optional[str] = None) -> Dict[str, int]:
+    """Apply updates atomically per batch, writing only changed fields and moving index memberships."""
+    ns = resolve_namespace(r, ns)
+    check_script_namespace(r, ns)
+    update_batch = r.register_script(UPDATE_MOVIES_LUA)
+    layout = active_layout()
+    index_keys = movie_index_keys(ns)
+    changed = 0
+    round_trips = 0
+    for i in range(0, len(movies), batch_size):
+        items = [encode_movie(movie, ns) for movie in movies[i:i + batch_size]]
+        changed += update_batch(keys=index_keys, args=[ns, layout.lua_spec()] + items)
+        round_trips += 1
+    return {"updated": len(movies), "changed": changed, "round_trips": round_trips}
+
+def update_movie_data(r: redis.Redis, json_data: List[Dict[str, Any]], batch_size: int = UPDATE_BATCH_SIZE,
+                      ns: Optional[str] = None) -> None:
+    movies = [movie for movie in json_data.get("movies", []) if 'id' in movie]
+    stats = update_movies(r, movies, batch_size, ns)
+    print(f"Updated {stats['updated']} movies in Redis ({stats['changed']} fields changed, "
+          f"{stats['round_trips']} round trips).")
+
+DELETE_MOVIES_LUA = STORAGE_LUA + """
+local ns = ARGV[1]
+local deleted = 0
+for i = 3, #ARGV do
+    local item = cjson.decode(ARGV[i])
+    local id = item['id']
+    local old = read_record(item)
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('ZREM', KEYS[5], id)
+    if old['genre'] then
+        redis.call('SREM', ns .. 'genre:' .. old['genre'], id)
+        redis.call('ZREM', ns .. 'genre:' .. old['genre'] .. ':revenue', id)
+        redis.call('ZREM', ns .. 'genre:' .. old['genre'] .. ':rating', id)
+    end
+    if old['director_id'] then
+        redis.call('SREM', ns .. 'director:' .. old['director_id'] .. ':movies', id)
+    end
+    if old['title'] then
+        if redis.call('HGET', KEYS[3], old['title']) == id then
+            redis.call('HDEL', KEYS[3], old['title'])
+        end
+        redis.call('ZREM', KEYS[4], string.lower(old['title']) .. '\\0' .. id)
+    end
+    if storage['packed'] then
+        deleted = deleted + redis.call('HDEL', item['key'], item['field'])
+    else
+        deleted = deleted + redis.call('UNLINK', item['key'])
+    end
+end
+drop_filtered_results()
+return deleted
+"""
+
+def delete_movies(r: redis.Redis, movie_ids: List[str], batch_size: int = DELETE_BATCH_SIZE,
+                  ns: Optional[str] = None) -> Dict[str, int]:
+    """Remove movies and all of their index memberships, one atomic script call per batch."""
+    ns = resolve_namespace(r, ns)
+    check_script_namespace(r, ns)
+    delete_batch = r.register_script(DELETE_MOVIES_LUA)
+    layout = active_layout()
+    index_keys = movie_index_keys(ns)
+    deleted = 0
+    round_trips = 0
+    for i in range(0, len(movie_ids), batch_size):
+        items = [json.dumps({**layout.storage_item(f"{ns}movie", movie_id), "id": movie_id})
+                 for movie_id in movie_ids[i:i + batch_size]]
+        deleted += delete_batch(keys=index_keys, args=[ns, layout.lua_spec()] + items)
+        round_trips += 1
+    return {"deleted": deleted, "round_trips": round_trips}
+
+def delete_movie_data(r: redis.Redis, json_data: List[Dict[str, Any]], ns: Optional[str] = None) -> None:
+    movie_ids = [movie["id"] for movie in json_data.get("movies", []) if 'id' in movie]
+    stats = delete_movies(r, movie_ids, ns=ns)
+    print(f"Deleted {stats['deleted']} of {len(movie_ids)} movies from Redis ({stats['round_trips']} round trips).")
+
+def cache_tracking_prefixes(ns: str) -> List[str]:
+    """Key prefixes a ClientSideCache (see cache.py) must track to stay coherent with the query functions."""
+    return [f"{ns}movie:", f"{ns}genre:", f"{ns}{REVENUE_KEY}", f"{ns}{RATING_KEY}"]
+
+def cached(cache, key: str, variant, fetch: Callable[[], Any]) -> Any:
+    """Serve fetch() through an optional ClientSideCache entry for (key, variant)."""
+    if cache is None:
+        return fetch()
+    value = cache.get(key, variant)
+    if value is None:
+        epoch = cache.epoch
+        value = fetch()
+        cache.set(key, value, variant, epoch)
+    return value
+
+def hydrate(r: redis.Redis, key_prefix: str, ids: List[str], fields: List[str] = None,
+            cache=None) -> List[Dict[str, str]]:
+    """Fetch the entities for ids in one pipelined round trip, reading only fields when given.
+
+    Storage goes through the active layout, so callers always get plain field -> value dicts.
+    Results line up with ids; missing ids come back as empty dicts. With a cache, only the ids
+    it misses are fetched.
+    """
+    layout = active_layout()
+    if cache is not None:
+        variant_fields = tuple(fields) if fields else None
+        epoch = cache.epoch
+        results = [cache.get(layout.storage_key(key_prefix, entity_id), (entity_id, variant_fields)) for entity_id in ids]
+        missing = [i for i, record in enumerate(results) if record is None]
+        fetched = hydrate(r, key_prefix, [ids[i] for i in missing], fields)
+        for i, record in zip(missing, fetched):
+            cache.set(layout.storage_key(key_prefix, ids[i]), record, (ids[i], variant_fields), epoch)
+            results[i] = record
+        return results
+
+    pipe = r.pipeline(transaction=False)
+    for entity_id in ids:
+        layout.queue_read(pipe, key_prefix, entity_id, fields)
+    return [layout.parse_read(raw, fields) for raw in pipe.execute()]
+
+def select_movie_data_by_name(r: redis.Redis, movie_name: List[str], ns: Optional[str] = None, cache=None) -> None:
+    ns = resolve_namespace(r, ns)
+    movie_ids = [mid for mid in r.hmget(f"{ns}{TITLE_INDEX_KEY}", movie_name) if mid is not None]
+    for movie in hydrate(r, f"{ns}movie", movie_ids, cache=cache):
+        if not movie:
+            continue
+        print(f"\nMovie Data for '{movie.get('title')}':")
+        for(key, value) in movie.items():
+            print(f"{key}: {value}")
+
+def select_movies_by_title_prefix(r: redis.Redis, prefix: str, limit: int = 10, ns: Optional[str] = None) -> None:
+    ns = resolve_namespace(r, ns)
+    prefix = fold_title(prefix)
+    members = r.zrangebylex(f"{ns}{TITLE_PREFIX_INDEX_KEY}", f"[{prefix}", f"[{prefix}\U0010ffff", start=0, num=limit)
+    movie_ids = [member.rpartition("\x00")[2] for member in members]
+    print(f"\nMovies with title starting with '{prefix}':")
+    for movie in hydrate(r, f"{ns}movie", movie_ids, ["title"]):
+        if movie:
+            print(f"Title: {movie['title']}")
+
+def select_top_n_movies_by_revenue(r: redis.Redis, order: str , n: int, ns: Optional[str] = None,
+                                   cache=None) -> None:
+    ns = resolve_namespace(r, ns)
+    key = f"{ns}{REVENUE_KEY}"
     if order == "top":
-        top_movies = r.zrevrange("boxoffice:revenue", 0, n-1, withscores=True)
+        top_movies = cached(cache, key, ("top", n), lambda: r.zrevrange(key, 0, n-1, withscores=True))
     if order == "bottom":
-        top_movies = r.zrange("boxoffice:revenue", 0, n-1, withscores=True)
+        top_movies = cached(cache, key, ("bottom", n), lambda: r.zrange(key, 0, n-1, withscores=True))
     print(f"\nTop {n} Movies by Revenue:")
-    for movie_id, revenue in top_movies:
-        movie = r.hgetall(f"movie:{movie_id}")
+    movies = hydrate(r, f"{ns}movie", [movie_id for movie_id, _ in top_movies], ["title"], cache)
+    for movie, (_, revenue) in zip(movies, top_movies):
         print(f"Title: {movie.get('title')}, Revenue: {revenue}")
 
-def select_top_n_movies_by_rating(r: redis.Redis, n: int) -> None:
-    top_movies = r.zrevrange("top:rated", 0, n-1, withscores=True)
+def select_top_n_movies_by_rating(r: redis.Redis, n: int, ns: Optional[str] = None, cache=None) -> None:
+    ns = resolve_namespace(r, ns)
+    key = f"{ns}{RATING_KEY}"
+    top_movies = cached(cache, key, ("top", n), lambda: r.zrevrange(key, 0, n-1, withscores=True))
     print(f"\nTop {n} Movies by Rating:")
-    for movie_id, rating in top_movies:
-        movie = r.hgetall(f"movie:{movie_id}")
+    movies = hydrate(r, f"{ns}movie", [movie_id for movie_id, _ in top_movies], ["title"], cache)
+    for movie, (_, rating) in zip(movies, top_movies):
         print(f"Title: {movie.get('title')}, Rating: {rating}")
 
-def select_movies_by_genre(r: redis.Redis, genre: str) -> None:
-    movie_ids = r.smembers(f"genre:{genre}")
+def select_movies_by_genre(r: redis.Redis, genre: str, ns: Optional[str] = None, cache=None) -> None:
+    ns = resolve_namespace(r, ns)
+    key = f"{ns}genre:{genre}"
+    movie_ids = cached(cache, key, None, lambda: list(r.smembers(key)))
     print(f"\nMovies in Genre '{genre}':")
-    for movie_id in movie_ids:
-        movie = r.hgetall(f"movie:{movie_id}")
+    for movie in hydrate(r, f"{ns}movie", movie_ids, ["title"], cache):
         print(f"Title: {movie.get('title')}")
 
-def find_actors_with_award(r: redis.Redis, find_award: str) -> None:
+def filtered_leaderboard(r: redis.Redis, metric: str, genre: str = None, year_range: Tuple[int, int] = None,
+                         director_id: str = None, ns: Optional[str] = None, ttl: int = FILTERED_TOP_N_TTL) -> str:
+    """Return a sorted set holding the metric leaderboard restricted to the given filters.
+
+    Genre-only filters map straight onto the maintained genre:{g}:{metric} leaderboards. Other
+    combinations are materialized with ZINTERSTORE (filters weighted 0, so scores stay the metric)
+    and kept for ttl seconds, so repeated ad-hoc queries reuse the result; they are registered in
+    FILTERED_TOP_N_RESULTS_KEY so the update and delete scripts can drop them.
+    """
+    ns = resolve_namespace(r, ns)
+    source = f"{ns}genre:{genre}:{metric}" if genre else f"{ns}{METRIC_KEYS[metric]}"
+    if year_range is None and director_id is None:
+        return source
+
+    years = f"{year_range[0]}-{year_range[1]}" if year_range else "*"
+    dest = f"{ns}tmp:top:{metric}:{genre or '*'}:{years}:{director_id or '*'}"
+    if r.exists(dest):
+        return dest
+
+    inputs = {source: 1}
+    pipe = r.pipeline(transaction=True)
+    if year_range:
+        year_members = f"{dest}:years"
+        pipe.zrangestore(year_members, f"{ns}{YEAR_INDEX_KEY}", year_range[0], year_range[1], byscore=True)
+        inputs[year_members] = 0
+    if director_id:
+        inputs[f"{ns}director:{director_id}:movies"] = 0
+    pipe.zinterstore(dest, inputs, aggregate="SUM")
+    pipe.expire(dest, ttl)
+    pipe.sadd(f"{ns}{FILTERED_TOP_N_RESULTS_KEY}", dest)
+    pipe.expire(f"{ns}{FILTERED_TOP_N_RESULTS_KEY}", ttl)
+    if year_range:
+        pipe.unlink(year_members)
+    pipe.execute()
+    return dest
+
+def top_n_movies(r: redis.Redis, metric: str, n: int, order: str = "top", genre: str = None,
+                 year_range: Tuple[int, int] = None, director_id: str = None,
+                 ns: Optional[str] = None) -> List[Tuple[str, float]]:
+    key = filtered_leaderboard(r, metric, genre, year_range, director_id, ns)
+    if order == "bottom":
+        return r.zrange(key, 0, n-1, withscores=True)
+    return r.zrevrange(key, 0, n-1, withscores=True)
+
+def select_top_n_movies(r: redis.Redis, metric: str, n: int, order: str = "top", genre: str = None,
+                        year_range: Tuple[int, int] = None, director_id: str = None, ns: Optional[str] = None) -> None:
+    ns = resolve_namespace(r, ns)
+    filters = [f"{name}={value}" for name, value in
+               (("genre", genre), ("years", year_range), ("director", director_id)) if value]
+    top_movies = top_n_movies(r, metric, n, order, genre, year_range, director_id, ns)
+    print(f"\n{order.capitalize()} {n} Movies by {metric.capitalize()} ({', '.join(filters) or 'all'}):")
+    movies = hydrate(r, f"{ns}movie", [movie_id for movie_id, _ in top_movies], ["title"])
+    for movie, (_, score) in zip(movies, top_movies):
+        if movie:
+            print(f"Title: {movie.get('title')}, {metric.capitalize()}: {score}")
+
+def find_with_awards(r: redis.Redis, entity: str, awards: List[str], match_all: bool = True,
+                     ns: Optional[str] = None) -> List[Dict[str, str]]:
+    """Hydrate every entity holding all (SINTER) or any (SUNION) of the given awards."""
+    ns = resolve_namespace(r, ns)
+    keys = [award_key(entity, award, ns) for award in awards]
+    entity_ids = r.sinter(keys) if match_all else r.sunion(keys)
+    return [record for record in hydrate(r, f"{ns}{AWARD_ENTITY_KEYS[entity]}", sorted(entity_ids)) if record]
+
+def find_actors_with_award(r: redis.Redis, find_award: str, ns: Optional[str] = None) -> None:
     print(f"\nActors with Award '{find_award}':")
-    actors_id = r.scan_iter(f"actors:*")
-    for aid in actors_id:
-        actor = r.hgetall(aid)
-        if find_award in actor.get("awards"):
-            print("\nActor details:")
-            for key, value in actor.items():
-                print(f"{key}: {value}")
-
+    for actor in find_with_awards(r, "actor", [find_award], ns=ns):
+        print("\nActor details:")
+        for key, value in actor.items():
+            print(f"{key}: {value}")
+
+def find_actors_with_awards(r: redis.Redis, awards: List[str], match_all: bool = True,
+                            ns: Optional[str] = None) -> None:
+    joiner = " AND " if match_all else " OR "
+    print(f"\nActors with Awards {joiner.join(repr(award) for award in awards)}:")
+    for actor in find_with_awards(r, "actor", awards, match_all, ns):
+        print(f"Name: {actor.get('name')}, Awards: {actor.get('awards')}")
+
+def find_directors_with_award(r: redis.Redis, find_award: str, ns: Optional[str] = None) -> None:
+    print(f"\nDirectors with Award '{find_award}':")
+    for director in find_with_awards(r, "director", [find_award], ns=ns):
+        print("\nDirector details:")
+        for key, value in director.items():
+            print(f"{key}: {value}")
 
 def main():
     r = connect_to_redis()
@@ -150,16 +650,17 @@ def main():
 
     # Check Database State
     key_count = r.dbsize()
+    ns = active_namespace(r)
+    use_layout(r.get(f"{ns}{LAYOUT_KEY}") or "hash")
+    reclaimer = None
 
     perform_import = False
 
     if key_count > 0:
-        print(f"\nDatabase currently contains {key_count} keys.")
-        user_input = input("Delete existing data and re-import? (y/N): ").strip().lower()
+        print(f"\nDatabase currently contains {key_count} keys (active namespace: '{ns}').")
+        user_input = input("Re-import into a new generation and retire the existing data? (y/N): ").strip().lower()
 
         if user_input == 'y':
-            print("Flushing database...")
-            r.flushall()
             perform_import = True
         else:
             print("Using existing data. Skipping import.")
@@ -167,6 +668,12 @@ def main():
         print("Database is empty. Starting fresh import.")
         perform_import = True
 
+    if perform_import:
+        generation = allocate_generation(r)
+        if generation is None:
+            print(f"Another import holds '{IMPORT_LOCK_KEY}'. Using existing data.")
+            perform_import = False
+
     if perform_import:
         print("\n" + "=" * 40)
         print("      STARTING IMPORT PROCESS")
@@ -174,6 +681,15 @@ def main():
 
         json_data = load_json(filename="in_import_data.json")
 
+        orphaned = reclaim_orphaned_generations(r, generation)
+        if orphaned:
+            print(f"Reclaimed {orphaned} keys left by unfinished imports.")
+        new_ns = generation_namespace(generation)
+        layout = use_layout(os.getenv("REDIS_LAYOUT", "hash"))
+        r.set(f"{new_ns}{LAYOUT_KEY}", layout.name)
+        print(f"Importing into namespace '{new_ns}' using the '{layout.name}' layout; "
+              f"readers keep using '{ns}' until it completes.")
+
         import_steps = [
             (import_movie_data, "Movies"),
             (import_director_data, "Directors"),
@@ -183,9 +699,15 @@ def main():
         input(f"Press Enter to proceed to next step...")
         for func, description in import_steps:
             print(f"\n>>> Importing {description}...")
-            func(r, json_data)
+            func(r, json_data, ns=new_ns)
             input(f"Press Enter to proceed to next step...")
 
+        activate_generation(r, generation)
+        print(f"Switched readers to namespace '{new_ns}'.")
+        if key_count > 0:
+            reclaimer = reclaim_namespace_in_background(r, ns)
+        ns = new_ns
+
         print("\n" + "=" * 40)
         print("      IMPORT COMPLETE")
         print("=" * 40 + "\n")
@@ -199,41 +721,58 @@ def main():
     print("\n[ Operation: Update Movies ]")
     print("Loading in_update_data.json...")
     json_update = load_json(filename="in_update_data.json")
-    update_movie_data(r, json_update)
+    update_movie_data(r, json_update, ns=ns)
     input(f"Updates applied. Press Enter to proceed to Queries...")
 
     print("\n[ Operation: Run Selections ]")
 
     print(">>> Selecting movies by name...")
     select_movie_data_by_name(r, movie_name=["Pulp Fiction", "Inception", "Interstellar", "The Dark Knight",
-                                             "Forrest Gump"])
+                                             "Forrest Gump"], ns=ns)
+
+    print("\n>>> Selecting movies by title prefix 'the'...")
+    select_movies_by_title_prefix(r, "the", ns=ns)
 
     print("\n>>> Selecting Top 10 by Revenue...")
-    select_top_n_movies_by_revenue(r, "top", 10)
+    select_top_n_movies_by_revenue(r, "top", 10, ns=ns)
 
     print("\n>>> Selecting Bottom 10 by Revenue...")
-    select_top_n_movies_by_revenue(r, "bottom", 10)
+    select_top_n_movies_by_revenue(r, "bottom", 10, ns=ns)
+
+    print("\n>>> Selecting Top 5 'Sci-Fi' by Revenue...")
+    select_top_n_movies(r, "revenue", 5, genre="Sci-Fi", ns=ns)
+
+    print("\n>>> Selecting Top 5 'Drama' by Rating released 1990-1999...")
+    select_top_n_movies(r, "rating", 5, genre="Drama", year_range=(1990, 1999), ns=ns)
 
     print("\n>>> Selecting 'Sci-Fi' Movies...")
-    select_movies_by_genre(r, "Sci-Fi")
+    select_movies_by_genre(r, "Sci-Fi", ns=ns)
 
     print("\n>>> Finding Actors with 'Emmy'...")
-    find_actors_with_award(r, "Emmy")
+    find_actors_with_award(r, "Emmy", ns=ns)
+
+    print("\n>>> Finding Actors with 'Academy Award' AND 'BAFTA'...")
+    find_actors_with_awards(r, ["Academy Award", "BAFTA"], ns=ns)
+
+    print("\n>>> Finding Directors with 'Palme d'Or'...")
+    find_directors_with_award(r, "Palme d'Or", ns=ns)
 
     input(f"Queries complete. Press Enter to proceed to Deletion...")
 
     print("\n[ Operation: Delete Movies ]")
     print("Loading in_delete_data.json...")
     json_delete = load_json(filename="in_delete_data.json")
-    delete_movie_data(r, json_delete)
+    delete_movie_data(r, json_delete, ns=ns)
 
     print("\n>>> Verifying Deletion (Querying 'Sci-Fi' again)...")
-    select_movies_by_genre(r, "Sci-Fi")
+    select_movies_by_genre(r, "Sci-Fi", ns=ns)
 
     print("\n" + "=" * 40)
     print("      OPERATIONS ARE COMPLETE")
     print("=" * 40)
 
+    if reclaimer:
+        reclaimer.join()
     r.close()
     return
 
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+
+from layouts import LAYOUTS, HashLayout
+from md1 import (
+    AWARD_ENTITY_KEYS,
+    GENERATION_KEY,
+    LAYOUT_KEY,
+    METRIC_KEYS,
+    TITLE_INDEX_KEY,
+    award_key,
+    generation_namespace,
+)
+
+MAX_CONNECTIONS = 20
+POOL_TIMEOUT = 5
+
+
+async def connect_to_redis_async(max_connections: int = MAX_CONNECTIONS):
+    """Async client whose pool blocks (up to POOL_TIMEOUT s) instead of opening more than max_connections."""
+    load_dotenv()
+
+    redis_host = os.getenv("REDIS_HOST")
+    redis_port = os.getenv("REDIS_PORT")
+    redis_user = os.getenv("REDIS_USER")
+    redis_password = os.getenv("REDIS_PASSWORD")
+
+    if not all([redis_host, redis_port, redis_user, redis_password]):
+        print("Error: Required environment variables are not set.")
+        return None
+
+    pool = aioredis.BlockingConnectionPool(
+        host=redis_host,
+        port=redis_port,
+        username=redis_user,
+        password=redis_password,
+        decode_responses=True,
+        max_connections=max_connections,
+        timeout=POOL_TIMEOUT,
+    )
+    r = aioredis.Redis(connection_pool=pool)
+    try:
+        await r.ping()
+        print("Connected to Redis (async) successfully!\n")
+        return r
+    except aioredis.ConnectionError:
+        print("Could not connect to Redis")
+        await pool.disconnect()
+        return None
+
+async def namespace_layout(r: aioredis.Redis, ns: str) -> HashLayout:
+    """The storage layout a generation was imported with."""
+    return LAYOUTS[await r.get(f"{ns}{LAYOUT_KEY}") or "hash"]
+
+async def active_namespace(r: aioredis.Redis) -> Tuple[str, HashLayout]:
+    """Resolve the active generation and its layout without touching the process-wide layout,
+    so coroutines reading different namespaces never switch it under each other."""
+    ns = generation_namespace(await r.get(GENERATION_KEY))
+    return ns, await namespace_layout(r, ns)
+
+async def resolve_namespace(r: aioredis.Redis, ns: Optional[str],
+                            layout: Optional[HashLayout]) -> Tuple[str, HashLayout]:
+    """The caller's namespace and layout, falling back to the active generation and its layout."""
+    if ns is None:
+        ns = generation_namespace(await r.get(GENERATION_KEY))
+    return ns, layout or await namespace_layout(r, ns)
+
+async def hydrate(r: aioredis.Redis, layout: HashLayout, key_prefix: str, ids: List[str],
+                  fields: List[str] = None) -> List[Dict[str, str]]:
+    async with r.pipeline(transaction=False) as pipe:
+        for entity_id in ids:
+            layout.queue_read(pipe, key_prefix, entity_id, fields)
+        results = await pipe.execute()
+    return [layout.parse_read(raw, fields) for raw in results]
+
+async def movies_by_name(r: aioredis.Redis, movie_names: List[str], ns: Optional[str] = None,
+                         layout: HashLayout = None) -> List[Dict[str, str]]:
+    ns, layout = await resolve_namespace(r, ns, layout)
+    movie_ids = [mid for mid in await r.hmget(f"{ns}{TITLE_INDEX_KEY}", movie_names) if mid is not None]
+    return [movie for movie in await hydrate(r, layout, f"{ns}movie", movie_ids) if movie]
+
+async def movies_by_genre(r: aioredis.Redis, genre: str, ns: Optional[str] = None,
+                          layout: HashLayout = None) -> List[Dict[str, str]]:
+    ns, layout = await resolve_namespace(r, ns, layout)
+    movie_ids = sorted(await r.smembers(f"{ns}genre:{genre}"))
+    return await hydrate(r, layout, f"{ns}movie", movie_ids, ["title"])
+
+async def top_n_movies(r: aioredis.Redis, metric: str, n: int, order: str = "top", genre: str = None,
+                       ns: Optional[str] = None, layout: HashLayout = None) -> List[Tuple[str, float]]:
+    ns, layout = await resolve_namespace(r, ns, layout)
+    key = f"{ns}genre:{genre}:{metric}" if genre else f"{ns}{METRIC_KEYS[metric]}"
+    if order == "bottom":
+        ranked = await r.zrange(key, 0, n-1, withscores=True)
+    else:
+        ranked = await r.zrevrange(key, 0, n-1, withscores=True)
+    movies = await hydrate(r, layout, f"{ns}movie", [movie_id for movie_id, _ in ranked], ["title"])
+    return [(movie.get("title"), score) for movie, (_, score) in zip(movies, ranked)]
+
+async def with_awards(r: aioredis.Redis, entity: str, awards: List[str], match_all: bool = True,
+                      ns: Optional[str] = None, layout: HashLayout = None) -> List[Dict[str, str]]:
+    ns, layout = await resolve_namespace(r, ns, layout)
+    keys = [award_key(entity, award, ns) for award in awards]
+    entity_ids = await (r.sinter(keys) if match_all else r.sunion(keys))
+    return [record for record in await hydrate(r, layout, f"{ns}{AWARD_ENTITY_KEYS[entity]}", sorted(entity_ids)) if record]
+
+async def timed(name: str, call: Awaitable[Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result, error = await call, None
+    except Exception as e:
+        result, error = None, e
+    return {"name": name, "result": result, "error": error, "latency_ms": (time.perf_counter() - start) * 1000}
+
+async def run_concurrently(calls: Dict[str, Awaitable[Any]]) -> Dict[str, Any]:
+    """Fan the named query coroutines out with gather; a failing call is reported, not raised."""
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(timed(name, call) for name, call in calls.items()))
+    return {
+        "results": {outcome["name"]: outcome for outcome in outcomes},
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "sum_ms": sum(outcome["latency_ms"] for outcome in outcomes),
+    }
+
+async def main():
+    r = await connect_to_redis_async()
+    if not r:
+        return
+
+    ns, layout = await active_namespace(r)
+    report = await run_concurrently({
+        "by_name": movies_by_name(r, ["Pulp Fiction", "Inception", "Interstellar"], ns=ns, layout=layout),
+        "sci_fi": movies_by_genre(r, "Sci-Fi", ns=ns, layout=layout),
+        "top_revenue": top_n_movies(r, "revenue", 10, ns=ns, layout=layout),
+        "top_rated": top_n_movies(r, "rating", 10, ns=ns, layout=layout),
+        "top_sci_fi_revenue": top_n_movies(r, "revenue", 5, genre="Sci-Fi", ns=ns, layout=layout),
+        "emmy_actors": with_awards(r, "actor", ["Emmy"], ns=ns, layout=layout),
+        "palme_directors": with_awards(r, "director", ["Palme d'Or"], ns=ns, layout=layout),
+    })
+
+    for name, outcome in report["results"].items():
+        print(f"\n[ {name} ] {outcome['latency_ms']:.1f} ms")
+        if outcome["error"] is not None:
+            print(f"Error: {outcome['error']}")
+            continue
+        for row in outcome["result"]:
+            print(row)
+
+    print(f"\nWall time {report['wall_ms']:.1f} ms for {report['sum_ms']:.1f} ms of query latency.")
+    await r.aclose()
+    await r.connection_pool.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,254 @@
+import heapq
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from redis.cluster import RedisCluster
+from redis.exceptions import RedisClusterException, RedisError
+
+from layouts import active_layout, use_layout
+from md1 import (
+    AWARD_ENTITY_KEYS,
+    IMPORT_CHUNK_SIZE,
+    IMPORT_LOCK_KEY,
+    LAYOUT_KEY,
+    TITLE_INDEX_KEY,
+    activate_generation,
+    active_namespace,
+    allocate_generation,
+    award_key,
+    delete_movies,
+    filtered_leaderboard,
+    generation_namespace,
+    load_json,
+    pipelined_import,
+    print_import_stats,
+    reclaim_namespace_in_background,
+    reclaim_orphaned_generations,
+    resolve_namespace,
+    update_movies,
+    write_actor,
+    write_director,
+    write_movie,
+)
+
+# Logical shards per generation. Every key of a shard shares the hash tag {s<k>}, so an entity,
+# its hash and all of its index entries live in one slot and the md1 Lua scripts run unchanged.
+CLUSTER_SHARDS = 16
+IMPORT_WORKERS = 8
+
+
+def connect_to_redis_cluster():
+    """Connect to a Redis Cluster through the REDIS_HOST/REDIS_PORT startup node."""
+    load_dotenv()
+
+    redis_host = os.getenv("REDIS_HOST")
+    redis_port = os.getenv("REDIS_PORT")
+    redis_user = os.getenv("REDIS_USER")
+    redis_password = os.getenv("REDIS_PASSWORD")
+
+    if not all([redis_host, redis_port, redis_user, redis_password]):
+        print("Error: Required environment variables are not set.")
+        return None
+
+    try:
+        r = RedisCluster(
+            host=redis_host,
+            port=int(redis_port),
+            decode_responses=True,
+            username=redis_user,
+            password=redis_password,
+        )
+        r.ping()
+        print(f"Connected to Redis Cluster ({len(r.get_primaries())} primaries) successfully!\n")
+        return r
+    except (RedisClusterException, RedisError) as e:
+        print(f"Could not connect to Redis Cluster: {e}")
+        return None
+
+def shard_of(entity_id: str) -> int:
+    return zlib.crc32(str(entity_id).encode()) % CLUSTER_SHARDS
+
+def shard_namespace(ns: str, shard: int) -> str:
+    return f"{ns}{{s{shard}}}:"
+
+def shard_namespaces(ns: str) -> List[str]:
+    return [shard_namespace(ns, shard) for shard in range(CLUSTER_SHARDS)]
+
+def group_by_shard(records: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    for record in records:
+        if 'id' in record:
+            groups.setdefault(shard_of(record["id"]), []).append(record)
+    return groups
+
+def sharded_import(r: RedisCluster, records: List[Dict[str, Any]],
+                   write_record: Callable, ns: Optional[str] = None,
+                   chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Run md1.pipelined_import once per shard, concurrently; each shard's pipeline targets a single slot."""
+    ns = resolve_namespace(r, ns)
+    start = time.perf_counter()
+    groups = group_by_shard(records)
+    with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as pool:
+        shard_stats = list(pool.map(
+            lambda shard: pipelined_import(r, groups[shard], write_record, chunk_size, shard_namespace(ns, shard)),
+            groups,
+        ))
+    elapsed = time.perf_counter() - start
+    imported = sum(stats["records"] for stats in shard_stats)
+    return {
+        "records": imported,
+        "round_trips": sum(stats["round_trips"] for stats in shard_stats),
+        "seconds": elapsed,
+        "records_per_sec": imported / elapsed if elapsed > 0 else 0.0,
+    }
+
+def import_cluster_data(r: RedisCluster, json_data: Dict[str, Any], ns: Optional[str] = None) -> None:
+    for entity, write_record in (("movies", write_movie), ("directors", write_director), ("actors", write_actor)):
+        stats = sharded_import(r, json_data.get(entity, []), write_record, ns)
+        print_import_stats(entity, stats)
+
+def update_movie_data_cluster(r: RedisCluster, json_data: Dict[str, Any], ns: Optional[str] = None) -> None:
+    ns = resolve_namespace(r, ns)
+    groups = group_by_shard(json_data.get("movies", []))
+    totals = {"updated": 0, "changed": 0, "round_trips": 0}
+    for shard, movies in groups.items():
+        for name, value in update_movies(r, movies, ns=shard_namespace(ns, shard)).items():
+            totals[name] += value
+    print(f"Updated {totals['updated']} movies across {len(groups)} shards "
+          f"({totals['changed']} fields changed, {totals['round_trips']} round trips).")
+
+def delete_movie_data_cluster(r: RedisCluster, json_data: Dict[str, Any], ns: Optional[str] = None) -> None:
+    ns = resolve_namespace(r, ns)
+    groups = group_by_shard(json_data.get("movies", []))
+    deleted = 0
+    for shard, movies in groups.items():
+        deleted += delete_movies(r, [movie["id"] for movie in movies], ns=shard_namespace(ns, shard))["deleted"]
+    print(f"Deleted {deleted} movies across {len(groups)} shards.")
+
+def cluster_hydrate(r: RedisCluster, ns: str, entity_prefix: str, ids: List[str],
+                    fields: List[str] = None) -> List[Dict[str, str]]:
+    """md1.hydrate across shards; the cluster pipeline splits the reads per node."""
+    layout = active_layout()
+    pipe = r.pipeline(transaction=False)
+    for entity_id in ids:
+        layout.queue_read(pipe, f"{shard_namespace(ns, shard_of(entity_id))}{entity_prefix}", entity_id, fields)
+    return [layout.parse_read(raw, fields) for raw in pipe.execute()]
+
+def per_shard(r: RedisCluster, ns: str, queue: Callable[[Any, str], None]) -> List[Any]:
+    """Queue one command per shard on a single cluster pipeline and return the per-shard replies."""
+    pipe = r.pipeline(transaction=False)
+    for shard_ns in shard_namespaces(ns):
+        queue(pipe, shard_ns)
+    return pipe.execute()
+
+def cluster_top_n(r: RedisCluster, metric: str, n: int, order: str = "top", genre: str = None,
+                  year_range: Tuple[int, int] = None, director_id: str = None,
+                  ns: Optional[str] = None) -> List[Tuple[str, float]]:
+    """Take each shard's top n and merge them; any movie in the global top n is in its shard's top n."""
+    ns = resolve_namespace(r, ns)
+    keys = {shard_ns: filtered_leaderboard(r, metric, genre, year_range, director_id, shard_ns)
+            for shard_ns in shard_namespaces(ns)}
+    if order == "bottom":
+        shard_ranks = per_shard(r, ns, lambda pipe, shard_ns: pipe.zrange(keys[shard_ns], 0, n-1, withscores=True))
+        return heapq.nsmallest(n, (entry for ranked in shard_ranks for entry in ranked), key=lambda entry: entry[1])
+    shard_ranks = per_shard(r, ns, lambda pipe, shard_ns: pipe.zrevrange(keys[shard_ns], 0, n-1, withscores=True))
+    return heapq.nlargest(n, (entry for ranked in shard_ranks for entry in ranked), key=lambda entry: entry[1])
+
+def select_top_n_movies_cluster(r: RedisCluster, metric: str, n: int, order: str = "top", genre: str = None,
+                                year_range: Tuple[int, int] = None, director_id: str = None,
+                                ns: Optional[str] = None) -> None:
+    ns = resolve_namespace(r, ns)
+    top_movies = cluster_top_n(r, metric, n, order, genre, year_range, director_id, ns)
+    print(f"\n{order.capitalize()} {n} Movies by {metric.capitalize()}{f' in {genre}' if genre else ''}:")
+    movies = cluster_hydrate(r, ns, "movie", [movie_id for movie_id, _ in top_movies], ["title"])
+    for movie, (_, score) in zip(movies, top_movies):
+        if movie:
+            print(f"Title: {movie.get('title')}, {metric.capitalize()}: {score}")
+
+def select_movie_data_by_name_cluster(r: RedisCluster, movie_name: List[str], ns: Optional[str] = None) -> None:
+    ns = resolve_namespace(r, ns)
+    shard_ids = per_shard(r, ns, lambda pipe, shard_ns: pipe.hmget(f"{shard_ns}{TITLE_INDEX_KEY}", movie_name))
+    movie_ids = [movie_id for ids in shard_ids for movie_id in ids if movie_id is not None]
+    for movie in cluster_hydrate(r, ns, "movie", movie_ids):
+        if not movie:
+            continue
+        print(f"\nMovie Data for '{movie.get('title')}':")
+        for key, value in movie.items():
+            print(f"{key}: {value}")
+
+def select_movies_by_genre_cluster(r: RedisCluster, genre: str, ns: Optional[str] = None) -> None:
+    ns = resolve_namespace(r, ns)
+    shard_ids = per_shard(r, ns, lambda pipe, shard_ns: pipe.smembers(f"{shard_ns}genre:{genre}"))
+    movie_ids = sorted(set().union(*shard_ids))
+    print(f"\nMovies in Genre '{genre}':")
+    for movie in cluster_hydrate(r, ns, "movie", movie_ids, ["title"]):
+        print(f"Title: {movie.get('title')}")
+
+def find_with_awards_cluster(r: RedisCluster, entity: str, awards: List[str], match_all: bool = True,
+                             ns: Optional[str] = None) -> List[Dict[str, str]]:
+    """Per-shard SINTER/SUNION; an entity's award memberships all sit in its own shard."""
+    ns = resolve_namespace(r, ns)
+    def queue(pipe, shard_ns):
+        keys = [award_key(entity, award, shard_ns) for award in awards]
+        if match_all:
+            pipe.sinter(keys)
+        else:
+            pipe.sunion(keys)
+    entity_ids = sorted(set().union(*per_shard(r, ns, queue)))
+    return [record for record in cluster_hydrate(r, ns, AWARD_ENTITY_KEYS[entity], entity_ids) if record]
+
+def main():
+    r = connect_to_redis_cluster()
+    if not r:
+        return
+
+    ns = active_namespace(r)
+    use_layout(r.get(f"{ns}{LAYOUT_KEY}") or "hash")
+    reclaimer = None
+
+    user_input = input(f"Import into a new sharded generation (active namespace: '{ns}')? (y/N): ").strip().lower()
+    if user_input == 'y':
+        generation = allocate_generation(r)
+        if generation is None:
+            print(f"Another import holds '{IMPORT_LOCK_KEY}'. Using existing data.")
+            user_input = 'n'
+    if user_input == 'y':
+        json_data = load_json(filename="in_import_data.json")
+        orphaned = reclaim_orphaned_generations(r, generation)
+        if orphaned:
+            print(f"Reclaimed {orphaned} keys left by unfinished imports.")
+        new_ns = generation_namespace(generation)
+        layout = use_layout(os.getenv("REDIS_LAYOUT", "hash"))
+        r.set(f"{new_ns}{LAYOUT_KEY}", layout.name)
+        print(f"Importing into namespace '{new_ns}' across {CLUSTER_SHARDS} shards using the '{layout.name}' layout...")
+        import_cluster_data(r, json_data, ns=new_ns)
+        activate_generation(r, generation)
+        reclaimer = reclaim_namespace_in_background(r, ns)
+        ns = new_ns
+
+    print("\n[ Operation: Update Movies ]")
+    update_movie_data_cluster(r, load_json(filename="in_update_data.json"), ns=ns)
+
+    print("\n[ Operation: Run Selections ]")
+    select_movie_data_by_name_cluster(r, ["Pulp Fiction", "Inception", "Interstellar"], ns=ns)
+    select_top_n_movies_cluster(r, "revenue", 10, ns=ns)
+    select_top_n_movies_cluster(r, "rating", 5, genre="Drama", ns=ns)
+    select_movies_by_genre_cluster(r, "Sci-Fi", ns=ns)
+    print("\nActors with Award 'Emmy':")
+    for actor in find_with_awards_cluster(r, "actor", ["Emmy"], ns=ns):
+        print(f"Name: {actor.get('name')}, Awards: {actor.get('awards')}")
+
+    print("\n[ Operation: Delete Movies ]")
+    delete_movie_data_cluster(r, load_json(filename="in_delete_data.json"), ns=ns)
+
+    if reclaimer:
+        reclaimer.join()
+    r.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import time
+from typing import Any, Dict, List
+
+from md2 import connect_to_neo4j, ensure_schema, import_car_data, import_insurance_company_data, \
+    import_person_data, import_policy_data
+
+# Car counts to import; each step doubles, so linear scaling keeps the per-car time flat
+SCALES = [500, 1000, 2000, 4000, 8000]
+POLICIES_PER_CAR = 2
+# Per-car time may drift this much from the smallest scale before the run is flagged as superlinear
+LINEAR_TOLERANCE = 2.0
+KEY_PREFIX = "BENCH-"
+
+
+def synthetic_data(cars: int) -> Dict[str, List[Dict[str, Any]]]:
+    persons = [{"social_security_number": f"{KEY_PREFIX}P-{i}", "full_name": f"Bench Person {i}",
+                "date_of_birth": "1990-01-01", "address": "", "phone_number": "", "risk_level": 1}
+               for i in range(cars)]
+    policies = [{"policy_id": f"{KEY_PREFIX}POL-{i}-{k}", "policy_type": "standard", "type_of_insurance": "OCTA",
+                 "start_date": "2023-01-01", "end_date": "2024-01-01", "insured_person": f"{KEY_PREFIX}P-{i}",
+                 "deductible_amount": 0, "coverage_amount": 1000, "insurance_company_id": f"{KEY_PREFIX}COMP"}
+                for i in range(cars) for k in range(POLICIES_PER_CAR)]
+    car_rows = [{"registration_number": f"{KEY_PREFIX}CAR-{i}", "vin": f"{KEY_PREFIX}VIN-{i}", "make": "Bench",
+                 "model": "Bench", "year": 2020, "owner": f"{KEY_PREFIX}P-{i}",
+                 "technical_inspection_date": "2023-01-01", "technical_inspection_end_date": "2024-01-01",
+                 "policy_number": [f"{KEY_PREFIX}POL-{i}-{k}" for k in range(POLICIES_PER_CAR)]}
+                for i in range(cars)]
+    return {
+        "insurance_companies": [{"id": f"{KEY_PREFIX}COMP", "name": "Bench", "address": "", "contact_email": ""}],
+        "persons": persons,
+        "policies": policies,
+        "cars": car_rows,
+    }
+
+def remove_synthetic_data(n) -> None:
+    # CALL ... IN TRANSACTIONS needs an auto-commit transaction, hence session.run
+    with n.session(database="neo4j") as session:
+        session.run("""
+            MATCH (x:InsuranceCompany|Person|Policy|Car)
+            WHERE coalesce(x.id, x.social_security_number, x.policy_id, x.registration_number) STARTS WITH $prefix
+            CALL { WITH x DETACH DELETE x } IN TRANSACTIONS OF 1000 ROWS
+        """, prefix=KEY_PREFIX).consume()
+
+def covers_links(n) -> int:
+    records, _, _ = n.execute_query("""
+        MATCH (:Policy)-[r:COVERS]->(c:Car)
+        WHERE c.registration_number STARTS WITH $prefix
+        RETURN count(r) AS links
+    """, prefix=KEY_PREFIX, database_="neo4j")
+    return records[0]["links"]
+
+def main():
+    n = connect_to_neo4j()
+    if not n:
+        return
+
+    ensure_schema(n)
+    remove_synthetic_data(n)
+
+    results = []
+    for cars in SCALES:
+        data = synthetic_data(cars)
+        print(f"\n>>> {cars} cars")
+        for import_step in (import_insurance_company_data, import_person_data, import_policy_data):
+            import_step(n, data)
+        start = time.perf_counter()
+        import_car_data(n, data)
+        seconds = time.perf_counter() - start
+        results.append({"cars": cars, "seconds": seconds, "us_per_car": seconds * 1e6 / cars,
+                        "links": covers_links(n)})
+        remove_synthetic_data(n)
+
+    print("\nCars\tSeconds\tMicrosecondsPerCar\tCoversLinks")
+    for row in results:
+        print(f"{row['cars']}\t{row['seconds']:.3f}\t{row['us_per_car']:.1f}\t{row['links']}")
+
+    growth = results[-1]["us_per_car"] / results[0]["us_per_car"]
+    expected_links = all(row["links"] == row["cars"] * POLICIES_PER_CAR for row in results)
+    print(f"\nPer-car time grew {growth:.2f}x from {SCALES[0]} to {SCALES[-1]} cars: "
+          f"{'linear' if growth <= LINEAR_TOLERANCE else 'SUPERLINEAR'}; "
+          f"COVERS links {'as expected' if expected_links else 'MISSING'}.")
+    n.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+# PROFILE executes the query and returns per-operator db hits and rows; it costs extra server work,
+# so it is opt-in, as is the JSON-lines query log. Timings and counters are kept in memory for
+# every instrumented query either way. Both settings are read per query, after connect_to_neo4j has loaded .env.
+
+# Public attributes of neo4j.SummaryCounters
+COUNTER_NAMES = (
+    "nodes_created", "nodes_deleted", "relationships_created", "relationships_deleted", "properties_set",
+    "labels_added", "labels_removed", "indexes_added", "indexes_removed", "constraints_added",
+    "constraints_removed", "system_updates",
+)
+
+_lock = threading.Lock()
+_queries: Dict[str, Dict[str, Any]] = {}
+_operators: Dict[tuple, Dict[str, Any]] = {}
+
+
+def profile_enabled() -> bool:
+    return os.getenv("NEO4J_PROFILE") == "1"
+
+def profiled(query: str) -> str:
+    return "PROFILE " + query if profile_enabled() else query
+
+def flatten_profile(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # operatorType carries a runtime suffix, e.g. "NodeIndexSeek@neo4j"
+    operators = [{
+        "operator": plan["operatorType"].split("@")[0],
+        "db_hits": plan.get("dbHits", 0),
+        "rows": plan.get("rows", 0),
+    }]
+    for child in plan.get("children", []):
+        operators += flatten_profile(child)
+    return operators
+
+def record_query(name: str, summary) -> Dict[str, Any]:
+    """Record one query's server timings, update counters and (under PROFILE) operator stats."""
+    counters = {name: getattr(summary.counters, name) for name in COUNTER_NAMES if getattr(summary.counters, name)}
+    operators = flatten_profile(summary.profile) if summary.profile else []
+    entry = {
+        "ts": time.time(),
+        "query": name,
+        "available_ms": summary.result_available_after,
+        "consumed_ms": summary.result_consumed_after,
+        "counters": counters,
+        "operators": operators,
+    }
+    query_log = os.getenv("NEO4J_QUERY_LOG")
+    with _lock:
+        totals = _queries.setdefault(name, {"calls": 0, "available_ms": 0, "consumed_ms": 0, "db_hits": 0})
+        totals["calls"] += 1
+        totals["available_ms"] += entry["available_ms"] or 0
+        totals["consumed_ms"] += entry["consumed_ms"] or 0
+        for op in operators:
+            totals["db_hits"] += op["db_hits"]
+            stats = _operators.setdefault((name, op["operator"]), {"calls": 0, "db_hits": 0, "rows": 0})
+            stats["calls"] += 1
+            stats["db_hits"] += op["db_hits"]
+            stats["rows"] += op["rows"]
+        if query_log:
+            with open(query_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
+
+def print_query_summary() -> None:
+    with _lock:
+        queries = sorted(_queries.items(), key=lambda item: item[1]["available_ms"] + item[1]["consumed_ms"],
+                         reverse=True)
+    print("Query\tCalls\tAvailableMs\tConsumedMs\tDbHits")
+    for name, totals in queries:
+        print(f"{name}\t{totals['calls']}\t{totals['available_ms']}\t{totals['consumed_ms']}\t{totals['db_hits']}")
+
+def print_operator_ranking(top: int = 10) -> None:
+    """The operators with the most db hits across the run (PROFILE mode only)."""
+    with _lock:
+        ranked = sorted(_operators.items(), key=lambda item: item[1]["db_hits"], reverse=True)[:top]
+    if not ranked:
+        print("No operator statistics (set NEO4J_PROFILE=1 to profile queries).")
+        return
+    print("Query\tOperator\tCalls\tDbHits\tRows")
+    for (name, operator), stats in ranked:
+        print(f"{name}\t{operator}\t{stats['calls']}\t{stats['db_hits']}\t{stats['rows']}")
@@ -1,8 +1,19 @@
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
+import hashlib
 import json
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
+from neo4j import READ_ACCESS, GraphDatabase, RoutingControl
+
+from instrumentation import print_operator_ranking, print_query_summary, profiled, record_query
+from report_cache import ReportCache
+from report_sinks import open_sink
+from reports import REPORTS
+from weather import WEATHER_DEFAULT_CATEGORY, WEATHER_RISK_RULES, weather_category
 
 
 def connect_to_neo4j():
@@ -39,40 +50,30 @@ def load_json(filename="data.json"):
         print(f"Error decoding JSON from file {filename}.")
         raise
 
-def delete_all_nodes(n):
-    try:
-        with n.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
-            print("All nodes and relationships deleted successfully.")
-    except Exception as e:
-        print(f"Error deleting nodes: {e}")
-        raise
-
-def import_insurance_company_data(n, json_data: List[Dict[str, Any]]) -> None:
-    n.execute_query("""
-        UNWIND $insurance_companies AS ic
+# Node queries only MERGE/SET their own label, so their chunks can run in parallel. Link queries
+# MATCH the already-imported nodes by key and MERGE the relationships; they run chunk by chunk.
+INSURANCE_COMPANY_NODES = """
+        UNWIND $rows AS ic
         MERGE (c:InsuranceCompany {id: ic.id})
         SET c.name = ic.name,
             c.address = ic.address,
-            c.contact_email = ic.contact_email
-    """, insurance_companies=json_data.get("insurance_companies", []), database_="neo4j")
-    print(f"Imported {len(json_data.get("insurance_companies", []))} insurance companies into DB.")
+            c.contact_email = ic.contact_email,
+            c.content_hash = ic.content_hash
+    """
 
-def import_person_data(n, json_data: List[Dict[str, Any]]) -> None:
-    n.execute_query("""
-        UNWIND $persons AS person
+PERSON_NODES = """
+        UNWIND $rows AS person
         MERGE (p:Person {social_security_number: person.social_security_number})
         SET p.full_name = person.full_name,
             p.date_of_birth = date(person.date_of_birth),
             p.address = person.address,
             p.phone_number = person.phone_number,
-            p.risk_level = person.risk_level
-    """, persons=json_data.get("persons", []), database_="neo4j")
-    print(f"Imported {len(json_data.get("persons", []))} persons into DB.")
+            p.risk_level = person.risk_level,
+            p.content_hash = person.content_hash
+    """
 
-def import_policy_data(n, json_data: List[Dict[str, Any]]) -> None:
-    n.execute_query("""
-        UNWIND $policies AS policy
+POLICY_NODES = """
+        UNWIND $rows AS policy
         MERGE (pol:Policy {policy_id: policy.policy_id})
         SET pol.policy_type = policy.policy_type, 
             pol.type_of_insurance = policy.type_of_insurance, 
@@ -82,8 +83,14 @@ def import_policy_data(n, json_data: List[Dict[str, Any]]) -> None:
             pol.deductible_amount = policy.deductible_amount, 
             pol.coverage_amount = policy.coverage_amount,
             pol.insurance_company_id = policy.insurance_company_id,
-            pol.name = policy.policy_id
-        
+            pol.name = policy.policy_id,
+            pol.content_hash = policy.content_hash
+    """
+
+POLICY_LINKS = """
+        UNWIND $rows AS policy
+        MATCH (pol:Policy {policy_id: policy.policy_id})
+
         WITH pol
         MATCH (p:Person {social_security_number: pol.insured_person})
         MERGE (pol)-[:COVERS]->(p)
@@ -91,47 +98,63 @@ def import_policy_data(n, json_data: List[Dict[str, Any]]) -> None:
         WITH pol
         MATCH (c:InsuranceCompany {id: pol.insurance_company_id})
         MERGE (c)-[:ISSUED]->(pol)
-    """, policies=json_data.get("policies", []), database_="neo4j")
-    print(f"Imported {len(json_data.get("policies", []))} policies into DB.")
+    """
 
-def import_car_data(n, json_data: List[Dict[str, Any]]) -> None:
-    n.execute_query("""
-        UNWIND $cars AS car
-        MERGE (c:Car {registration_number: car.registration_number, vin: car.vin})
-        SET c.make = car.make,
+CAR_NODES = """
+        UNWIND $rows AS car
+        MERGE (c:Car {registration_number: car.registration_number})
+        SET c.vin = car.vin,
+            c.make = car.make,
             c.model = car.model,
             c.year = toInteger(car.year),
             c.owner = car.owner,
             c.technical_inspection_date = date(car.technical_inspection_date),
             c.technical_inspection_end_date = date(car.technical_inspection_end_date),
-            c.policy_number = car.policy_number
-        
-        WITH c        
-        MATCH (p:Person {social_security_number: c.owner})
+            c.policy_number = car.policy_number,
+            c.content_hash = car.content_hash
+    """
+
+CAR_LINKS = """
+        UNWIND $rows AS car
+        MATCH (c:Car {registration_number: car.registration_number})
+
+        WITH c, car
+        MATCH (p:Person {social_security_number: car.owner})
         MERGE (p)-[:OWNS]->(c)
         
-        WITH c
-        MATCH (c:Car)
-        WHERE c.policy_number IS NOT NULL
-        UNWIND c.policy_number AS policy_number
-        MATCH (p:Policy {policy_id: policy_number})
-        MERGE (p)-[:COVERS]->(c)
-    """, cars=json_data.get("cars", []), database_="neo4j")
-    print(f"Imported {len(json_data.get("cars", []))} cars into DB.")
-
-def import_accident_data(n, json_data: List[Dict[str, Any]]) -> None:
-    n.execute_query("""
-        UNWIND $accidents AS acc
+        // Only this row's own policy numbers: no re-MATCH on :Car, one index seek per policy
+        WITH c, car
+        UNWIND car.policy_number AS policy_number
+        MATCH (pol:Policy {policy_id: policy_number})
+        MERGE (pol)-[:COVERS]->(c)
+    """
+
+ACCIDENT_NODES = """
+        UNWIND $rows AS acc
 
         // Create the Accident Node
         MERGE (a:Accident {accident_id: acc.accident_id})
         SET a.date = datetime(acc.date),
             a.weather = acc.weather_conditions,
+            a.weather_category = acc.weather_category,
             a.description = acc.description,
             a.severity = acc.severity_level,
             a.location = point({latitude: acc.location.lat, longitude: acc.location.lon}),
             a.location_desc = acc.location.desc,
-            a.name = acc.accident_id
+            a.name = acc.accident_id,
+            a.content_hash = acc.content_hash
+    """
+
+# Rewrites only the category, for accidents reclassified by backfill_weather_categories
+WEATHER_BACKFILL = """
+        UNWIND $rows AS acc
+        MATCH (a:Accident {accident_id: acc.accident_id})
+        SET a.weather_category = acc.weather_category
+    """
+
+ACCIDENT_LINKS = """
+        UNWIND $rows AS acc
+        MATCH (a:Accident {accident_id: acc.accident_id})
             
         // Link Involved Cars and their damage details
         WITH a, acc
@@ -141,27 +164,33 @@ def import_accident_data(n, json_data: List[Dict[str, Any]]) -> None:
         SET r.damage_level = car_data.damage_level,
             r.damage_desc = car_data.damage_description
 
-        // Link Involved People and their roles and injuries
-        WITH a, acc
+        // Link Involved People and their roles and injuries; DISTINCT folds the per-car rows back to
+        // one per accident, or every person's severity would be added once per involved car
+        WITH DISTINCT a, acc
         UNWIND acc.involved_persons AS person_data
         MATCH (p:Person {social_security_number: person_data.ssn})
         MERGE (p)-[r:INVOLVED_IN]->(a)
+        ON CREATE SET p.accident_count = coalesce(p.accident_count, 0) + 1
         SET r.role = person_data.role,
-            r.injuries = person_data.injuries
+            r.injuries = person_data.injuries,
+            // Swap the severity this link last added to the person's totals for the current one
+            p.severity_sum = coalesce(p.severity_sum, 0) - coalesce(r.counted_severity, 0) + coalesce(a.severity, 0),
+            p.severity_count = coalesce(p.severity_count, 0)
+                               - CASE WHEN r.counted_severity IS NULL THEN 0 ELSE 1 END
+                               + CASE WHEN a.severity IS NULL THEN 0 ELSE 1 END
+        SET r.counted_severity = a.severity
 
         // Check for "At Fault" party and create relationship
-        WITH a, acc
+        WITH DISTINCT a, acc
         UNWIND acc.involved_cars AS car_data_fault
         WITH a, car_data_fault
         WHERE car_data_fault.at_fault_party IS NOT NULL
         MATCH (p_fault:Person {social_security_number: car_data_fault.at_fault_party})
         MERGE (p_fault)-[:CAUSED]->(a)
-    """, accidents=json_data.get("accidents", []), database_="neo4j")
-    print(f"Imported {len(json_data.get("accidents", []))} accidents into DB.")
+    """
 
-def import_claim_data(n, json_data: List[Dict[str, Any]]) -> None:
-    n.execute_query("""
-        UNWIND $claims AS c
+CLAIM_NODES = """
+        UNWIND $rows AS c
         MERGE (cl:Claim {claim_id: c.claim_id})
         SET cl.date_filed = datetime(c.date_filed),
             cl.claimant = c.claimant,
@@ -169,7 +198,13 @@ def import_claim_data(n, json_data: List[Dict[str, Any]]) -> None:
             cl.accident_id = c.accident_id,
             cl.claim_amount = c.claim_amount,
             cl.status = c.status,
-            cl.name = c.claim_id
+            cl.name = c.claim_id,
+            cl.content_hash = c.content_hash
+    """
+
+CLAIM_LINKS = """
+        UNWIND $rows AS c
+        MATCH (cl:Claim {claim_id: c.claim_id})
             
         WITH c, cl
         MATCH (p:Person {social_security_number: cl.claimant})
@@ -182,108 +217,833 @@ def import_claim_data(n, json_data: List[Dict[str, Any]]) -> None:
         WITH c, cl
         MATCH (a:Accident {accident_id: cl.accident_id})
         MERGE (cl)-[r:ARISING_FROM]->(a)
-    """, claims=json_data.get("claims", []), database_="neo4j")
-    print(f"Imported {len(json_data.get("claims", []))} claims into DB.")
+    """
 
-def run_report_1(n) -> None:
-    records, summary, keys = n.execute_query("""
-        // centerPoint - "Brīvības piemineklis"
-        WITH point({latitude: 56.951, longitude: 24.113}) AS centerPoint
-        
-        MATCH (a:Accident)-[:INVOLVED_IN]-(p:Person)-[:COVERS]-(pol:Policy)-[:ISSUED]-(ic:InsuranceCompany)
-        WHERE point.distance(a.location, centerPoint) < 20000 
-          AND p.date_of_birth >= date("1991-01-01")
-          AND ic.name CONTAINS "ERGO"
-        
-        RETURN DISTINCT a.accident_id as AccidentID, 
-               apoc.temporal.format(a.date,'dd MMMM yyyy HH:mm') as AccidentDate, 
-               a.location_desc as LocationDescription, 
-               a.weather as WeatherDescription,
-               p.full_name as FullName,
-               p.date_of_birth as DateOfBirth,
-               ic.name as InsuranceCompany,
-               round(point.distance(a.location, centerPoint)) AS DistanceFromCenter
-        ORDER BY DistanceFromCenter ASC
-    """, database_="neo4j")
-    print("AccidentID\tAccidentDate\tLocationDescription\tWeatherDescription\tFullName\tDateOfBirth\tInsuranceCompany\tDistanceFromCenter")
-    for r in records:
-        print(f"{r['AccidentID']}\t{r['AccidentDate']}\t{r['LocationDescription']}\t{r['WeatherDescription']}\t{r['FullName']}\t{r['DateOfBirth']}\t{r['InsuranceCompany']}\t{r['DistanceFromCenter']}")
-
-def run_report_2(n) -> None:
-    records, summary, keys = n.execute_query("""
-        MATCH (p:Person)-[:INVOLVED_IN]-(a:Accident)
-        RETURN p.full_name as FullName,
-               p.social_security_number as SocialSecurityNumber,
-               COUNT(DISTINCT a) AS TotalAccidents,
-               ROUND(AVG(a.severity),2) as AverageAccidentSeverity
-        ORDER BY TotalAccidents DESC
-        LIMIT 5
-    """, database_="neo4j")
-    print("FullName\tSocialSecurityNumber\tTotalAccidents\tAverageAccidentSeverity")
-    for r in records:
-        print(f"{r['FullName']}\t{r['SocialSecurityNumber']}\t{r['TotalAccidents']}\t{r['AverageAccidentSeverity']}")
-
-def run_report_3(n) -> None:
-    records, summary, keys = n.execute_query("""
-        MATCH (ic:InsuranceCompany)-[:ISSUED]-(pol:Policy)
-        OPTIONAL MATCH (pol)-[:FILED_UNDER]-(cl:Claim)
-        WHERE cl.status IN ['approved', 'pending']
-        WITH ic, pol, SUM(COALESCE(cl.claim_amount, 0)) AS PolicyClaimTotal
-        RETURN 
-            ic.name AS InsuranceCompanyName,
-            SUM(pol.coverage_amount) AS PotentialLiability,
-            SUM(PolicyClaimTotal) AS RealizedClaimCosts,
-            (SUM(pol.coverage_amount) + SUM(PolicyClaimTotal)) AS TotalExposure
-        ORDER BY 
-            TotalExposure DESC
-        LIMIT 5
-    """, database_="neo4j")
-    print("InsuranceCompanyName\tPotentialLiability\tRealizedClaimCosts\tTotalExposure")
-    for r in records:
-        print(f"{r['InsuranceCompanyName']}\t{r['PotentialLiability']}\t{r['RealizedClaimCosts']}\t{r['TotalExposure']}")
-
-def run_report_4(n) -> None:
-    records, summary, keys = n.execute_query("""
-    MATCH (a:Accident)
-    WITH a,
-      CASE 
-        WHEN toLower(a.weather) CONTAINS 'snow' 
-          OR toLower(a.weather) CONTAINS 'ice' 
-          OR toLower(a.weather) CONTAINS 'hail' 
-          THEN 'High Risk'
-        WHEN toLower(a.weather) CONTAINS 'rain' 
-          OR toLower(a.weather) CONTAINS 'wet' 
-          THEN 'Moderate Risk (Rain/Wet)'
-        WHEN toLower(a.weather) IN ['fog', 'dusk', 'mist'] 
-          OR toLower(a.weather) = 'wind'
-          THEN 'Moderate Risk (Visibility/Wind)'
-        ELSE 'Low Risk (Clear/Dry)'
-      END AS WeatherCategory
-    RETURN 
-      WeatherCategory,
-      count(a) as AccidentCount,
-      round(avg(a.severity), 2) as AvgSeverity
-    ORDER BY AvgSeverity DESC
-    """, database_="neo4j")
-    print("WeatherCategory\tAccidentCount\tAvgSeverity")
-    for r in records:
-        print(f"{r['WeatherCategory']}\t{r['AccidentCount']}\t{r['AvgSeverity']}")
-
-def run_report_5(n) -> None:
-    records, summary, keys = n.execute_query("""
-    MATCH (cl:Claim)-[:FILED_UNDER]-(pol:Policy)
-    MATCH (pol)-[:ISSUED]-(ic:InsuranceCompany)
-      WHERE cl.status = 'approved'
-    RETURN 
-      ic.name AS InsuranceCompany,
-      MAX(cl.claim_amount) AS MaxClaimAmount
-    ORDER BY
-      MaxClaimAmount DESC
-    LIMIT 1
-    """, database_="neo4j")
-    print("InsuranceCompany\tMaxClaimAmount")
+# Prune queries run before the link queries and delete the relationships a row no longer
+# describes, so re-importing a changed row over existing data leaves no stale links behind.
+POLICY_PRUNE = """
+        UNWIND $rows AS policy
+        MATCH (pol:Policy {policy_id: policy.policy_id})
+
+        OPTIONAL MATCH (pol)-[covers:COVERS]->(p:Person)
+        WHERE NOT coalesce(p.social_security_number = policy.insured_person, false)
+        DELETE covers
+
+        WITH DISTINCT pol, policy
+        OPTIONAL MATCH (ic:InsuranceCompany)-[issued:ISSUED]->(pol)
+        WHERE NOT coalesce(ic.id = policy.insurance_company_id, false)
+        DELETE issued
+    """
+
+CAR_PRUNE = """
+        UNWIND $rows AS car
+        MATCH (c:Car {registration_number: car.registration_number})
+
+        OPTIONAL MATCH (p:Person)-[owns:OWNS]->(c)
+        WHERE NOT coalesce(p.social_security_number = car.owner, false)
+        DELETE owns
+
+        WITH DISTINCT c, car
+        OPTIONAL MATCH (pol:Policy)-[covers:COVERS]->(c)
+        WHERE NOT pol.policy_id IN coalesce(car.policy_number, [])
+        DELETE covers
+    """
+
+ACCIDENT_PRUNE = """
+        UNWIND $rows AS acc
+        MATCH (a:Accident {accident_id: acc.accident_id})
+
+        OPTIONAL MATCH (c:Car)-[involved:INVOLVED_IN]->(a)
+        WHERE NOT c.registration_number IN [car_data IN coalesce(acc.involved_cars, []) | car_data.registration_number]
+        DELETE involved
+
+        // A person's link carries what it added to the person's accident totals: retract that first
+        WITH DISTINCT a, acc
+        OPTIONAL MATCH (p:Person)-[involved:INVOLVED_IN]->(a)
+        WHERE NOT p.social_security_number IN [person_data IN coalesce(acc.involved_persons, []) | person_data.ssn]
+        SET p.accident_count = p.accident_count - 1,
+            p.severity_sum = p.severity_sum - coalesce(involved.counted_severity, 0),
+            p.severity_count = p.severity_count - CASE WHEN involved.counted_severity IS NULL THEN 0 ELSE 1 END
+        DELETE involved
+
+        WITH DISTINCT a, acc
+        OPTIONAL MATCH (p:Person)-[caused:CAUSED]->(a)
+        WHERE NOT p.social_security_number IN [car_data IN coalesce(acc.involved_cars, [])
+                                               WHERE car_data.at_fault_party IS NOT NULL | car_data.at_fault_party]
+        DELETE caused
+    """
+
+CLAIM_PRUNE = """
+        UNWIND $rows AS c
+        MATCH (cl:Claim {claim_id: c.claim_id})
+
+        OPTIONAL MATCH (p:Person)-[filed:FILED]->(cl)
+        WHERE NOT coalesce(p.social_security_number = c.claimant, false)
+        DELETE filed
+
+        WITH DISTINCT cl, c
+        OPTIONAL MATCH (cl)-[under:FILED_UNDER]->(pol:Policy)
+        WHERE NOT coalesce(pol.policy_id = c.policy_number, false)
+        DELETE under
+
+        WITH DISTINCT cl, c
+        OPTIONAL MATCH (cl)-[arising:ARISING_FROM]->(a:Accident)
+        WHERE NOT coalesce(a.accident_id = c.accident_id, false)
+        DELETE arising
+    """
+
+# Aggregates read by reports 2, 3 and 5, maintained as data is imported instead of recomputed per
+# report. Every contribution is also recorded on the contributing node/relationship (counted_*),
+# so a re-import first retracts what it added last time and the totals never double-count.
+POLICY_AGGREGATES = """
+        UNWIND $rows AS policy
+        MATCH (pol:Policy {policy_id: policy.policy_id})
+
+        OPTIONAL MATCH (old:InsuranceCompany {id: pol.counted_company})
+        CALL {
+            WITH pol, old
+            WITH pol, old WHERE old IS NOT NULL
+            SET old.potential_liability = old.potential_liability - pol.counted_coverage,
+                old.policy_count = old.policy_count - 1
+        }
+
+        CALL {
+            WITH pol
+            OPTIONAL MATCH (ic:InsuranceCompany)-[:ISSUED]->(pol)
+            RETURN ic LIMIT 1
+        }
+        SET pol.counted_company = ic.id,
+            pol.counted_coverage = CASE WHEN ic IS NULL THEN null ELSE coalesce(pol.coverage_amount, 0) END
+        WITH pol, ic WHERE ic IS NOT NULL
+        SET ic.potential_liability = coalesce(ic.potential_liability, 0) + pol.counted_coverage,
+            ic.policy_count = coalesce(ic.policy_count, 0) + 1
+    """
+
+# A retracted claim may have been its old total's maximum: recompute those from their members.
+# A total left without claims is flagged too and deleted here, so report 3 never joins an empty one;
+# the single indexed flag keeps this an index seek rather than a ClaimTotal label scan.
+CLAIM_TOTAL_MAX_REFRESH = """
+        WITH count(*) AS claims
+        MATCH (t:ClaimTotal {stale_max: true})
+        OPTIONAL MATCH (other:Claim {counted_company: t.company_id, counted_status: t.status})
+        WITH t, max(other.counted_max) AS remaining_max
+        SET t.max_amount = remaining_max
+        REMOVE t.stale_max
+        WITH t WHERE t.claims = 0
+        DETACH DELETE t
+    """
+
+# Claim totals live on (:InsuranceCompany)-[:HAS_CLAIM_TOTAL]->(:ClaimTotal {company_id, status})
+CLAIM_AGGREGATES = """
+        UNWIND $rows AS c
+        MATCH (cl:Claim {claim_id: c.claim_id})
+
+        OPTIONAL MATCH (old:ClaimTotal {company_id: cl.counted_company, status: cl.counted_status})
+        CALL {
+            WITH cl, old
+            WITH cl, old WHERE old IS NOT NULL
+            SET old.amount = old.amount - cl.counted_amount,
+                old.claims = old.claims - 1
+            SET old.stale_max = coalesce(old.stale_max, false) OR coalesce(cl.counted_max >= old.max_amount, false)
+                                OR old.claims = 0
+        }
+
+        CALL {
+            WITH cl
+            OPTIONAL MATCH (cl)-[:FILED_UNDER]->(:Policy)<-[:ISSUED]-(ic:InsuranceCompany)
+            RETURN ic LIMIT 1
+        }
+        WITH cl, CASE WHEN cl.status IS NULL THEN null ELSE ic END AS ic
+        SET cl.counted_company = ic.id,
+            cl.counted_status = CASE WHEN ic IS NULL THEN null ELSE cl.status END,
+            cl.counted_amount = CASE WHEN ic IS NULL THEN null ELSE coalesce(cl.claim_amount, 0) END,
+            cl.counted_max = CASE WHEN ic IS NULL THEN null ELSE cl.claim_amount END
+        CALL {
+            WITH cl, ic
+            WITH cl, ic WHERE ic IS NOT NULL
+            MERGE (t:ClaimTotal {company_id: ic.id, status: cl.status})
+            ON CREATE SET t.amount = 0, t.claims = 0
+            MERGE (ic)-[:HAS_CLAIM_TOTAL]->(t)
+            SET t.amount = t.amount + cl.counted_amount,
+                t.claims = t.claims + 1,
+                t.max_amount = CASE WHEN t.max_amount IS NULL OR cl.counted_max > t.max_amount
+                                    THEN cl.counted_max ELSE t.max_amount END
+        }
+    """ + CLAIM_TOTAL_MAX_REFRESH
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_WORKERS = 4
+
+def chunked(rows: List[Dict[str, Any]], chunk_size: int) -> List[List[Dict[str, Any]]]:
+    return [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+def write_chunk(n, description: str, query: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write one chunk in its own managed transaction; execute_write retries transient errors such as deadlocks."""
+    attempts = 0
+
+    def work(tx):
+        nonlocal attempts
+        attempts += 1
+        return tx.run(profiled(query), rows=rows).consume()
+
+    start = time.perf_counter()
+    with n.session(database="neo4j") as session:
+        record_query(description, session.execute_write(work))
+    return {"rows": len(rows), "ms": (time.perf_counter() - start) * 1000, "retries": attempts - 1}
+
+def write_chunks(n, description: str, query: str, rows: List[Dict[str, Any]],
+                 chunk_size: int = IMPORT_CHUNK_SIZE, workers: int = 1) -> Dict[str, Any]:
+    """Write rows in chunks over up to `workers` sessions, printing per-batch progress and latency."""
+    chunks = chunked(rows, chunk_size)
+    batches = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(write_chunk, n, description, query, chunk) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), 1):
+            batch = future.result()
+            batches.append(batch)
+            retried = f", {batch['retries']} retries" if batch["retries"] else ""
+            print(f"  {description}: batch {done}/{len(chunks)}, {batch['rows']} rows in {batch['ms']:.1f} ms{retried}")
+    return {
+        "batches": len(batches),
+        "retries": sum(batch["retries"] for batch in batches),
+        "max_ms": max((batch["ms"] for batch in batches), default=0.0),
+        "seconds": time.perf_counter() - start,
+    }
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """Stable hash of one input entity: key order and the stored hash itself do not affect it."""
+    entity = {key: value for key, value in row.items() if key != "content_hash"}
+    encoded = json.dumps(entity, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def import_entities(n, description: str, rows: List[Dict[str, Any]], node_query: str, link_query: str = None,
+                    link_order: str = None, aggregate_query: str = None, prune_query: str = None,
+                    derive: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+                    chunk_size: int = IMPORT_CHUNK_SIZE, workers: int = IMPORT_WORKERS) -> None:
+    """Import one entity list: node chunks in parallel, then prune, link and aggregate chunks one at a time.
+
+    Link rows are sorted by link_order (the key of the densest node they attach to), so the
+    relationships of one hub node are written by as few transactions as possible and no two link
+    transactions ever compete for its lock. Every node stores the content_hash of its row; fields
+    added by derive are computed after hashing, so they never make an unchanged row look changed.
+    """
+    if not rows:
+        print(f"No {description.lower()} to import.")
+        return
+    rows = [dict(row, content_hash=content_hash(row), **(derive(row) if derive else {})) for row in rows]
+    steps = [write_chunks(n, description, node_query, rows, chunk_size, workers)]
+    if link_query:
+        if link_order:
+            rows = sorted(rows, key=lambda row: str(row.get(link_order)))
+        if prune_query:
+            steps.append(write_chunks(n, f"{description} stale links", prune_query, rows, chunk_size, workers=1))
+        steps.append(write_chunks(n, f"{description} links", link_query, rows, chunk_size, workers=1))
+    if aggregate_query:
+        steps.append(write_chunks(n, f"{description} aggregates", aggregate_query, rows, chunk_size, workers=1))
+    bump_graph_version(n)
+    print(f"Imported {len(rows)} {description.lower()} into DB "
+          f"({sum(step['batches'] for step in steps)} batches, {sum(step['retries'] for step in steps)} retries, "
+          f"slowest batch {max(step['max_ms'] for step in steps):.1f} ms, {sum(step['seconds'] for step in steps):.2f} s).")
+
+# prune=True drops the stale links of re-imported rows first; delta_import sets it, a fresh import
+# after delete_all_nodes has nothing to prune. Companies and persons own no links.
+def import_insurance_company_data(n, json_data: List[Dict[str, Any]], prune: bool = False) -> None:
+    import_entities(n, "Insurance companies", json_data.get("insurance_companies", []), INSURANCE_COMPANY_NODES)
+
+def import_person_data(n, json_data: List[Dict[str, Any]], prune: bool = False) -> None:
+    import_entities(n, "Persons", json_data.get("persons", []), PERSON_NODES)
+
+def import_policy_data(n, json_data: List[Dict[str, Any]], prune: bool = False) -> None:
+    import_entities(n, "Policies", json_data.get("policies", []), POLICY_NODES, POLICY_LINKS,
+                    link_order="insurance_company_id", aggregate_query=POLICY_AGGREGATES,
+                    prune_query=POLICY_PRUNE if prune else None)
+
+def import_car_data(n, json_data: List[Dict[str, Any]], prune: bool = False) -> None:
+    import_entities(n, "Cars", json_data.get("cars", []), CAR_NODES, CAR_LINKS, link_order="owner",
+                    prune_query=CAR_PRUNE if prune else None)
+
+def import_accident_data(n, json_data: List[Dict[str, Any]], prune: bool = False) -> None:
+    import_entities(n, "Accidents", json_data.get("accidents", []), ACCIDENT_NODES, ACCIDENT_LINKS,
+                    link_order="accident_id", prune_query=ACCIDENT_PRUNE if prune else None,
+                    derive=lambda acc: {"weather_category": weather_category(acc.get("weather_conditions"))})
+
+def import_claim_data(n, json_data: List[Dict[str, Any]], prune: bool = False) -> None:
+    import_entities(n, "Claims", json_data.get("claims", []), CLAIM_NODES, CLAIM_LINKS, link_order="policy_number",
+                    aggregate_query=CLAIM_AGGREGATES, prune_query=CLAIM_PRUNE if prune else None)
+
+# Removal queries for entities missing from a delta import's input. Each one first retracts what
+# the removed node contributed to the maintained aggregates, then detaches and deletes it.
+REMOVE_CLAIMS = """
+        UNWIND $rows AS c
+        MATCH (cl:Claim {claim_id: c.claim_id})
+        OPTIONAL MATCH (t:ClaimTotal {company_id: cl.counted_company, status: cl.counted_status})
+        SET t.amount = t.amount - cl.counted_amount,
+            t.claims = t.claims - 1
+        SET t.stale_max = coalesce(t.stale_max, false) OR coalesce(cl.counted_max >= t.max_amount, false)
+                          OR t.claims = 0
+        DETACH DELETE cl
+    """ + CLAIM_TOTAL_MAX_REFRESH
+
+REMOVE_ACCIDENTS = """
+        UNWIND $rows AS acc
+        MATCH (a:Accident {accident_id: acc.accident_id})
+        OPTIONAL MATCH (p:Person)-[involved:INVOLVED_IN]->(a)
+        SET p.accident_count = p.accident_count - 1,
+            p.severity_sum = p.severity_sum - coalesce(involved.counted_severity, 0),
+            p.severity_count = p.severity_count - CASE WHEN involved.counted_severity IS NULL THEN 0 ELSE 1 END
+        WITH DISTINCT a
+        DETACH DELETE a
+    """
+
+REMOVE_CARS = """
+        UNWIND $rows AS car
+        MATCH (c:Car {registration_number: car.registration_number})
+        DETACH DELETE c
+    """
+
+REMOVE_POLICIES = """
+        UNWIND $rows AS policy
+        MATCH (pol:Policy {policy_id: policy.policy_id})
+        OPTIONAL MATCH (ic:InsuranceCompany {id: pol.counted_company})
+        SET ic.potential_liability = ic.potential_liability - pol.counted_coverage,
+            ic.policy_count = ic.policy_count - 1
+        DETACH DELETE pol
+    """
+
+REMOVE_PERSONS = """
+        UNWIND $rows AS person
+        MATCH (p:Person {social_security_number: person.social_security_number})
+        DETACH DELETE p
+    """
+
+REMOVE_INSURANCE_COMPANIES = """
+        UNWIND $rows AS ic
+        MATCH (c:InsuranceCompany {id: ic.id})
+        OPTIONAL MATCH (c)-[:HAS_CLAIM_TOTAL]->(t:ClaimTotal)
+        DETACH DELETE t
+        WITH DISTINCT c
+        DETACH DELETE c
+    """
+
+# Policies and claims whose counted company no longer matches the graph, e.g. after their policy
+# moved to another company or their company was removed; both are label scans, run once per delta
+STALE_POLICY_AGGREGATES = """
+        MATCH (pol:Policy)
+        OPTIONAL MATCH (ic:InsuranceCompany)-[:ISSUED]->(pol)
+        WITH pol, head(collect(ic.id)) AS company_id
+        WHERE coalesce(pol.counted_company, '') <> coalesce(company_id, '')
+        RETURN pol.policy_id AS policy_id
+    """
+
+STALE_CLAIM_AGGREGATES = """
+        MATCH (cl:Claim)
+        OPTIONAL MATCH (cl)-[:FILED_UNDER]->(:Policy)<-[:ISSUED]-(ic:InsuranceCompany)
+        WITH cl, head(collect(ic.id)) AS company_id
+        WITH cl, CASE WHEN cl.status IS NULL THEN null ELSE company_id END AS company_id
+        WHERE coalesce(cl.counted_company, '') <> coalesce(company_id, '')
+        RETURN cl.claim_id AS claim_id
+    """
+
+# (input list, label, key, import function, removal query), in dependency order for imports;
+# removals run in reverse so no removed node is still needed by a later one
+DELTA_ENTITIES = [
+    ("insurance_companies", "InsuranceCompany", "id", import_insurance_company_data, REMOVE_INSURANCE_COMPANIES),
+    ("persons", "Person", "social_security_number", import_person_data, REMOVE_PERSONS),
+    ("policies", "Policy", "policy_id", import_policy_data, REMOVE_POLICIES),
+    ("cars", "Car", "registration_number", import_car_data, REMOVE_CARS),
+    ("accidents", "Accident", "accident_id", import_accident_data, REMOVE_ACCIDENTS),
+    ("claims", "Claim", "claim_id", import_claim_data, REMOVE_CLAIMS),
+]
+
+def stored_hashes(n, label: str, key: str) -> Dict[Any, Optional[str]]:
+    """Key -> content_hash of every stored node of a label (None for nodes imported before hashing)."""
+    records, _, _ = n.execute_query(f"MATCH (x:{label}) RETURN x.{key} AS key, x.content_hash AS hash",
+                                    routing_=RoutingControl.READ, database_="neo4j")
+    return {record["key"]: record["hash"] for record in records if record["key"] is not None}
+
+def entity_references(entity: str, row: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """(label, key) of every node an input row links to."""
+    if entity == "policies":
+        return [("Person", row.get("insured_person")), ("InsuranceCompany", row.get("insurance_company_id"))]
+    if entity == "cars":
+        return [("Person", row.get("owner"))] + [("Policy", number) for number in row.get("policy_number") or []]
+    if entity == "accidents":
+        cars = row.get("involved_cars") or []
+        return ([("Car", car.get("registration_number")) for car in cars]
+                + [("Person", car.get("at_fault_party")) for car in cars]
+                + [("Person", person.get("ssn")) for person in row.get("involved_persons") or []])
+    if entity == "claims":
+        return [("Person", row.get("claimant")), ("Policy", row.get("policy_number")),
+                ("Accident", row.get("accident_id"))]
+    return []
+
+def resync_aggregates(n) -> int:
+    """Re-run the aggregate queries for policies and claims whose counted company is out of date."""
+    resynced = 0
+    for description, stale_query, aggregate_query in (
+        ("Policy aggregates", STALE_POLICY_AGGREGATES, POLICY_AGGREGATES),
+        ("Claim aggregates", STALE_CLAIM_AGGREGATES, CLAIM_AGGREGATES),
+    ):
+        records, _, _ = n.execute_query(stale_query, routing_=RoutingControl.READ, database_="neo4j")
+        if records:
+            write_chunks(n, description, aggregate_query, [record.data() for record in records])
+        resynced += len(records)
+    return resynced
+
+def delta_import(n, json_data: Dict[str, Any], remove_missing: bool = False) -> Dict[str, int]:
+    """Import only the entities whose content_hash changed, without wiping the graph first.
+
+    A row is rewritten when its hash differs from the stored one or when it links to a node that
+    this run creates (its links could not be made before). With remove_missing, stored entities
+    absent from the input are removed. Only when policies or companies were written or removed can
+    a claim or policy have its company changed underneath it; those aggregates are then re-synced.
+    """
+    start = time.perf_counter()
+    stored = {entity: stored_hashes(n, label, key) for entity, label, key, _, _ in DELTA_ENTITIES}
+    created = set()
+    touched = set()
+    totals = {"unchanged": 0, "written": 0, "removed": 0, "resynced": 0}
+
+    for entity, label, key, import_data, _ in DELTA_ENTITIES:
+        rows = json_data.get(entity, [])
+        hashes = stored[entity]
+        changed = [row for row in rows
+                   if hashes.get(row.get(key)) != content_hash(row)
+                   or any(reference in created for reference in entity_references(entity, row))]
+        created.update((label, row.get(key)) for row in rows if row.get(key) not in hashes)
+        print(f"\n>>> {entity}: {len(changed)} new or changed, {len(rows) - len(changed)} unchanged")
+        import_data(n, {entity: changed}, prune=True)
+        totals["written"] += len(changed)
+        if changed:
+            touched.add(entity)
+        totals["unchanged"] += len(rows) - len(changed)
+
+    if remove_missing:
+        for entity, label, key, _, remove_query in reversed(DELTA_ENTITIES):
+            present = {row.get(key) for row in json_data.get(entity, [])}
+            missing = [{key: value} for value in stored[entity] if value not in present]
+            if missing:
+                write_chunks(n, f"Removing {entity}", remove_query, missing)
+                totals["removed"] += len(missing)
+                touched.add(entity)
+
+    if touched & {"insurance_companies", "policies"}:
+        totals["resynced"] = resync_aggregates(n)
+    if totals["removed"] or totals["resynced"]:
+        bump_graph_version(n)
+    print(f"Delta import: {totals['written']} written, {totals['unchanged']} unchanged, {totals['removed']} removed, "
+          f"{totals['resynced']} aggregates re-synced in {time.perf_counter() - start:.2f} s.")
+    return totals
+
+# (constraint name, label, key property or properties) for every key the imports MERGE/MATCH on.
+# A uniqueness constraint also creates the range index that backs those lookups.
+SCHEMA_CONSTRAINTS = [
+    ("insurance_company_id", "InsuranceCompany", "id"),
+    ("person_ssn", "Person", "social_security_number"),
+    ("policy_id", "Policy", "policy_id"),
+    ("car_registration_number", "Car", "registration_number"),
+    ("accident_id", "Accident", "accident_id"),
+    ("claim_id", "Claim", "claim_id"),
+    ("claim_total_key", "ClaimTotal", ("company_id", "status")),
+]
+# (index name, label, property or properties) range indexes for the maintained aggregates
+SCHEMA_RANGE_INDEXES = [
+    ("person_accident_count", "Person", "accident_count"),
+    ("claim_total_status", "ClaimTotal", "status"),
+    ("claim_contribution", "Claim", ("counted_company", "counted_status")),
+    ("claim_total_stale_max", "ClaimTotal", "stale_max"),
+    ("accident_weather_category", "Accident", "weather_category"),
+]
+# (index name, label, point property) for geo lookups
+SCHEMA_POINT_INDEXES = [
+    ("accident_location", "Accident", "location"),
+]
+SCHEMA_AWAIT_TIMEOUT = 300
+
+# Import queries (all unwinding $rows), checked by verify_import_plans
+IMPORT_QUERIES = [
+    ("Insurance Companies", INSURANCE_COMPANY_NODES),
+    ("Persons", PERSON_NODES),
+    ("Policies", POLICY_NODES),
+    ("Policy links", POLICY_LINKS),
+    ("Cars", CAR_NODES),
+    ("Car links", CAR_LINKS),
+    ("Accidents", ACCIDENT_NODES),
+    ("Accident links", ACCIDENT_LINKS),
+    ("Claims", CLAIM_NODES),
+    ("Claim links", CLAIM_LINKS),
+    ("Policy stale links", POLICY_PRUNE),
+    ("Car stale links", CAR_PRUNE),
+    ("Accident stale links", ACCIDENT_PRUNE),
+    ("Claim stale links", CLAIM_PRUNE),
+    ("Remove claims", REMOVE_CLAIMS),
+    ("Remove accidents", REMOVE_ACCIDENTS),
+    ("Remove cars", REMOVE_CARS),
+    ("Remove policies", REMOVE_POLICIES),
+    ("Remove persons", REMOVE_PERSONS),
+    ("Remove insurance companies", REMOVE_INSURANCE_COMPANIES),
+    ("Weather categories", WEATHER_BACKFILL),
+    ("Policy aggregates", POLICY_AGGREGATES),
+    ("Claim aggregates", CLAIM_AGGREGATES),
+]
+INDEX_SEEK_OPERATORS = ("NodeUniqueIndexSeek", "NodeIndexSeek")
+SCAN_OPERATORS = ("NodeByLabelScan", "AllNodesScan")
+
+def schema_properties(key) -> str:
+    keys = key if isinstance(key, tuple) else (key,)
+    return "(" + ", ".join(f"n.{k}" for k in keys) + ")"
+
+def ensure_schema(n) -> None:
+    """Idempotently create the key constraints and indexes and wait until they are ONLINE."""
+    for name, label, key in SCHEMA_CONSTRAINTS:
+        n.execute_query(
+            f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE {schema_properties(key)} IS UNIQUE",
+            database_="neo4j",
+        )
+    for name, label, key in SCHEMA_RANGE_INDEXES:
+        n.execute_query(f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON {schema_properties(key)}",
+                        database_="neo4j")
+    for name, label, key in SCHEMA_POINT_INDEXES:
+        n.execute_query(f"CREATE POINT INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{key})", database_="neo4j")
+    n.execute_query("CALL db.awaitIndexes($timeout)", timeout=SCHEMA_AWAIT_TIMEOUT, database_="neo4j")
+    print(f"Schema ready: {len(SCHEMA_CONSTRAINTS)} uniqueness constraints, {len(SCHEMA_RANGE_INDEXES)} range "
+          f"indexes and {len(SCHEMA_POINT_INDEXES)} point indexes online.")
+
+def plan_operators(plan: Dict[str, Any]) -> List[str]:
+    # operatorType carries a runtime suffix, e.g. "NodeUniqueIndexSeek(Locking)@neo4j"
+    operators = [plan["operatorType"].split("@")[0]]
+    for child in plan.get("children", []):
+        operators += plan_operators(child)
+    return operators
+
+def verify_import_plans(n) -> bool:
+    """EXPLAIN every import query and report whether its key lookups are index seeks or label scans."""
+    all_seek = True
+    for description, query in IMPORT_QUERIES:
+        _, summary, _ = n.execute_query("EXPLAIN " + query, rows=[], database_="neo4j")
+        operators = plan_operators(summary.plan)
+        seeks = sum(1 for op in operators if op.startswith(INDEX_SEEK_OPERATORS))
+        scans = [op for op in operators if op.startswith(SCAN_OPERATORS)]
+        all_seek = all_seek and not scans
+        print(f"{description}\tindex seeks: {seeks}\tscans: {', '.join(scans) if scans else 'none'}")
+    return all_seek
+
+def check_aggregates(n) -> List[str]:
+    """Recompute the maintained aggregates from the graph and list every stored value that disagrees."""
+    mismatches = []
+    records, _, _ = n.execute_query("""
+        MATCH (p:Person)
+        OPTIONAL MATCH (p)-[:INVOLVED_IN]-(a:Accident)
+        WITH p, count(DISTINCT a) AS accidents, sum(a.severity) AS severity_sum, count(a.severity) AS severity_count
+        WHERE accidents <> coalesce(p.accident_count, 0)
+           OR severity_sum <> coalesce(p.severity_sum, 0)
+           OR severity_count <> coalesce(p.severity_count, 0)
+        RETURN 'Person ' + p.social_security_number AS entity,
+               [p.accident_count, p.severity_sum, p.severity_count] AS stored,
+               [accidents, severity_sum, severity_count] AS expected
+        UNION ALL
+        MATCH (ic:InsuranceCompany)
+        OPTIONAL MATCH (ic)-[:ISSUED]-(pol:Policy)
+        WITH ic, count(pol) AS policies, sum(coalesce(pol.coverage_amount, 0)) AS liability
+        WHERE policies <> coalesce(ic.policy_count, 0) OR liability <> coalesce(ic.potential_liability, 0)
+        RETURN 'InsuranceCompany ' + ic.id AS entity,
+               [ic.policy_count, ic.potential_liability] AS stored,
+               [policies, liability] AS expected
+    """, routing_=RoutingControl.READ, database_="neo4j")
+    mismatches += [f"{r['entity']}: stored {r['stored']}, expected {r['expected']}" for r in records]
+
+    records, _, _ = n.execute_query("""
+        MATCH (ic:InsuranceCompany)-[:ISSUED]-(:Policy)-[:FILED_UNDER]-(cl:Claim)
+        WHERE cl.status IS NOT NULL
+        RETURN ic.id AS company_id, cl.status AS status, count(cl) AS claims,
+               sum(coalesce(cl.claim_amount, 0)) AS amount, max(cl.claim_amount) AS max_amount
+    """, routing_=RoutingControl.READ, database_="neo4j")
+    expected = {(r["company_id"], r["status"]): [r["claims"], r["amount"], r["max_amount"]] for r in records}
+    records, _, _ = n.execute_query("""
+        MATCH (t:ClaimTotal)
+        WHERE t.claims > 0
+        RETURN t.company_id AS company_id, t.status AS status, t.claims AS claims,
+               t.amount AS amount, t.max_amount AS max_amount
+    """, routing_=RoutingControl.READ, database_="neo4j")
+    stored = {(r["company_id"], r["status"]): [r["claims"], r["amount"], r["max_amount"]] for r in records}
+    for company_id, status in sorted(set(expected) | set(stored)):
+        if expected.get((company_id, status)) != stored.get((company_id, status)):
+            mismatches.append(f"ClaimTotal {company_id}/{status}: stored {stored.get((company_id, status))}, "
+                              f"expected {expected.get((company_id, status))}")
+    return mismatches
+
+WIPE_BATCH_SIZE = 10000
+
+def delete_in_batches(n, description: str, query: str, batch_size: int = WIPE_BATCH_SIZE) -> int:
+    """Repeat a `... LIMIT $batch_size DELETE ... RETURN count(*) AS deleted` query until nothing is left."""
+    total = 0
+    while True:
+        with n.session(database="neo4j") as session:
+            deleted = session.execute_write(lambda tx: tx.run(query, batch_size=batch_size).single()["deleted"])
+        if not deleted:
+            return total
+        total += deleted
+        print(f"  Deleted {total} {description}...")
+
+def drop_schema(n) -> None:
+    """Drop constraints before indexes: a constraint's backing index can only go with the constraint."""
+    records, _, _ = n.execute_query("SHOW CONSTRAINTS YIELD name", database_="neo4j")
+    for record in records:
+        n.execute_query(f"DROP CONSTRAINT `{record['name']}` IF EXISTS", database_="neo4j")
+    records, _, _ = n.execute_query("SHOW INDEXES YIELD name, type WHERE type <> 'LOOKUP'", database_="neo4j")
+    for record in records:
+        n.execute_query(f"DROP INDEX `{record['name']}` IF EXISTS", database_="neo4j")
+    print("Dropped schema.")
+
+def recreate_database(n) -> bool:
+    """Drop and recreate the database in one step; only Enterprise Edition supports it."""
+    records, _, _ = n.execute_query("CALL dbms.components() YIELD edition", database_="system")
+    if not records or records[0]["edition"] != "enterprise":
+        return False
+    n.execute_query("CREATE OR REPLACE DATABASE neo4j WAIT", database_="system")
+    print("Database neo4j recreated.")
+    return True
+
+def delete_all_nodes(n, batch_size: int = WIPE_BATCH_SIZE, recreate: bool = False) -> None:
+    """Wipe the graph without one huge transaction, then rebuild the schema on the empty database.
+
+    Relationships go first, so no node batch has to DETACH a dense hub in one go; the schema is
+    dropped up front so the deletes skip index maintenance.
+    """
+    try:
+        if not (recreate and recreate_database(n)):
+            drop_schema(n)
+            relationships = delete_in_batches(n, "relationships", """
+                MATCH ()-[r]->() WITH r LIMIT $batch_size DELETE r RETURN count(*) AS deleted
+            """, batch_size)
+            nodes = delete_in_batches(n, "nodes", """
+                MATCH (x) WITH x LIMIT $batch_size DETACH DELETE x RETURN count(*) AS deleted
+            """, batch_size)
+            print(f"Deleted {nodes} nodes and {relationships} relationships in batches of {batch_size}.")
+        ensure_schema(n)
+        bump_graph_version(n)
+        print("All nodes and relationships deleted successfully.")
+    except Exception as e:
+        print(f"Error deleting nodes: {e}")
+        raise
+
+GRAPH_META_NAME = "md2"
+
+def bump_graph_version(n) -> None:
+    """Mark the graph as changed; a wiped graph gets a new epoch so old versions can never match again."""
+    n.execute_query("""
+        MERGE (g:GraphMeta {name: $name})
+        ON CREATE SET g.epoch = randomUUID(), g.version = 0
+        SET g.version = g.version + 1
+    """, name=GRAPH_META_NAME, database_="neo4j")
+
+def weather_rules_digest() -> str:
+    return content_hash({"rules": WEATHER_RISK_RULES, "default": WEATHER_DEFAULT_CATEGORY})
+
+def record_weather_rules(n) -> None:
+    """Record on GraphMeta that every stored accident is classified with the current rules."""
+    n.execute_query("""
+        MERGE (g:GraphMeta {name: $name})
+        ON CREATE SET g.epoch = randomUUID(), g.version = 0
+        SET g.weather_rules = $rules
+    """, name=GRAPH_META_NAME, rules=weather_rules_digest(), database_="neo4j")
+
+def backfill_weather_categories(n, force: bool = False) -> int:
+    """Reclassify stored accidents after WEATHER_RISK_RULES changed; read-only while the recorded rules match.
+
+    force (`md2.py --backfill-weather`) reclassifies regardless of the recorded rules.
+    """
+    records, _, _ = n.execute_query("""
+        MATCH (g:GraphMeta {name: $name})
+        RETURN g.weather_rules AS rules
+    """, name=GRAPH_META_NAME, routing_=RoutingControl.READ, database_="neo4j")
+    if not force and records and records[0]["rules"] == weather_rules_digest():
+        return 0
+
+    records, _, _ = n.execute_query("""
+        MATCH (a:Accident)
+        WHERE a.accident_id IS NOT NULL
+        RETURN a.accident_id AS accident_id, a.weather AS weather, a.weather_category AS category
+    """, routing_=RoutingControl.READ, database_="neo4j")
+    changed = [{"accident_id": record["accident_id"], "weather_category": weather_category(record["weather"])}
+               for record in records if weather_category(record["weather"]) != record["category"]]
+    if changed:
+        write_chunks(n, "Weather categories", WEATHER_BACKFILL, changed)
+        bump_graph_version(n)
+    record_weather_rules(n)
+    print(f"Weather categories: {len(changed)} of {len(records)} accidents reclassified.")
+    return len(changed)
+
+def graph_version(n) -> Optional[str]:
+    """Current graph version, or None for a graph imported before versioning (results are not cached)."""
+    records, _, _ = n.execute_query("""
+        MATCH (g:GraphMeta {name: $name})
+        RETURN g.epoch + ':' + toString(g.version) AS version
+    """, name=GRAPH_META_NAME, routing_=RoutingControl.READ, database_="neo4j")
+    return records[0]["version"] if records else None
+
+# Report query texts this process has sent before. Only a repeated text can reuse a plan from the
+# server's query cache, but whether it did (evictions, replanning) is not visible from here.
+QUERY_TEXT_STATS = {"repeated": 0, "new": 0}
+_sent_queries = set()
+_sent_queries_lock = threading.Lock()
+REPORT_WORKERS = 5
+
+def bind_params(title: str, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Check overrides against the report's typed parameters and fill in the defaults."""
+    report = REPORTS[title]
+    unknown = set(overrides) - set(report["params"])
+    if unknown:
+        raise ValueError(f"Unknown parameters for report '{title}': {', '.join(sorted(unknown))}")
+    params = {}
+    for name, (kind, default) in report["params"].items():
+        value = overrides.get(name, default)
+        if kind is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if not isinstance(value, kind):
+            raise TypeError(f"Parameter '{name}' of report '{title}' must be {kind.__name__}, got {type(value).__name__}")
+        params[name] = value
+    if "derive" in report:
+        params.update(report["derive"](params))
+    return params
+
+def run_report(n, title: str, cache: ReportCache = None, **overrides) -> Tuple[List[Any], Dict[str, Any]]:
+    """Run a registered report with bound parameters; returns its records and timing stats.
+
+    With a cache, results are reused for as long as the graph version is unchanged.
+    """
+    query = REPORTS[title]["query"]
+    definition = {"query": query, "columns": REPORTS[title]["columns"]}
+    params = bind_params(title, overrides)
+    version = graph_version(n) if cache else None
+    if version:
+        records = cache.get(title, definition, params, version)
+        if records is not None:
+            return records, {"rows": len(records), "result_cache": "hit", "query_text": "n/a",
+                             "available_ms": 0, "consumed_ms": 0}
+
+    # Read-routed managed transaction: served by a read replica/follower when connected to a cluster
+    records, summary, keys = n.execute_query(profiled(query), params, routing_=RoutingControl.READ, database_="neo4j")
+    record_query(title, summary)
+    records = [record.data() for record in records]
+    if version:
+        cache.set(title, definition, params, version, records)
+    with _sent_queries_lock:
+        repeated = query in _sent_queries
+        _sent_queries.add(query)
+        QUERY_TEXT_STATS["repeated" if repeated else "new"] += 1
+    return records, {
+        "rows": len(records),
+        "result_cache": "miss" if version else "off",
+        "query_text": "repeated" if repeated else "new",
+        # Server time until the first record was available (planning + start of execution),
+        # then the time it took to stream the rest
+        "available_ms": summary.result_available_after,
+        "consumed_ms": summary.result_consumed_after,
+    }
+
+def print_records(title: str, records: List[Any], stats: Dict[str, Any]) -> None:
+    columns = REPORTS[title]["columns"]
+    print("\t".join(columns))
     for r in records:
-        print(f"{r['InsuranceCompany']}\t{r['MaxClaimAmount']}")
+        print("\t".join(str(r[column]) for column in columns))
+    print(f"({stats['rows']} rows, result cache {stats['result_cache']}, query text {stats['query_text']}, "
+          f"first row after {stats['available_ms']} ms, consumed after {stats['consumed_ms']} ms)")
+
+def print_report(n, title: str, cache: ReportCache = None, **overrides) -> Dict[str, Any]:
+    records, stats = run_report(n, title, cache, **overrides)
+    print_records(title, records, stats)
+    return stats
+
+def timed_report(n, title: str, overrides: Dict[str, Any], cache: ReportCache = None) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        (records, stats), error = run_report(n, title, cache, **overrides), None
+    except Exception as e:
+        records, stats, error = None, None, e
+    return {"records": records, "stats": stats, "error": error, "latency_ms": (time.perf_counter() - start) * 1000}
+
+def run_reports_concurrently(n, requests: Dict[str, Dict[str, Any]] = None, workers: int = REPORT_WORKERS,
+                             cache: ReportCache = None) -> Dict[str, Any]:
+    """Run reports (title -> parameter overrides, default: every non-streamed one) on a thread pool.
+
+    Results come back keyed and ordered like `requests`, whatever order the reports finish in;
+    a failing report is reported, not raised.
+    """
+    if requests is None:
+        requests = {title: {} for title, report in REPORTS.items() if not report.get("stream")}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {title: pool.submit(timed_report, n, title, overrides, cache) for title, overrides in requests.items()}
+        results = {title: future.result() for title, future in futures.items()}
+    return {
+        "results": results,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "sum_ms": sum(outcome["latency_ms"] for outcome in results.values()),
+    }
+
+STREAM_FETCH_SIZE = 1000
+
+def stream_report(n, title: str, fmt: str = "tsv", output: str = None, fetch_size: int = STREAM_FETCH_SIZE,
+                  **overrides) -> Dict[str, Any]:
+    """Write a report row by row to a TSV/CSV/NDJSON sink (output file, or stdout) without collecting it.
+
+    session.run pulls fetch_size records per round trip, so client memory stays bounded by the fetch
+    size however many rows the report returns.
+    """
+    query = REPORTS[title]["query"]
+    params = bind_params(title, overrides)
+    stream = open(output, "w", newline="", encoding="utf-8") if output else sys.stdout
+    rows, first_row_ms = 0, None
+    start = time.perf_counter()
+    try:
+        write_row = open_sink(fmt, REPORTS[title]["columns"], stream)
+        with n.session(database="neo4j", default_access_mode=READ_ACCESS, fetch_size=fetch_size) as session:
+            result = session.run(profiled(query), params)
+            for record in result:
+                if first_row_ms is None:
+                    first_row_ms = (time.perf_counter() - start) * 1000
+                write_row(record)
+                rows += 1
+            summary = result.consume()
+            record_query(title, summary)
+    finally:
+        if output:
+            stream.close()
+    return {
+        "rows": rows,
+        "first_row_ms": first_row_ms,
+        "total_ms": (time.perf_counter() - start) * 1000,
+        "available_ms": summary.result_available_after,
+        "consumed_ms": summary.result_consumed_after,
+    }
+
+def accidents_within_radius(n, latitude: float, longitude: float, radius_m: float, born_after: str,
+                            company: str) -> List[Any]:
+    """Accidents within radius_m of a point involving a person born on/after born_after and insured by company.
+
+    The point index on Accident.location answers the withinBBox prefilter, so only accidents inside
+    the box are expanded; the exact distance check and the rest of the pattern run on those alone.
+    """
+    records, _ = run_report(n, "1: Accidents near a point", latitude=latitude, longitude=longitude,
+                            radius_m=radius_m, born_after=born_after, company=company)
+    return records
+
+def run_report_1(n, cache: ReportCache = None, **params) -> None:
+    print_report(n, "1: Accidents near a point", cache, **params)
+
+def run_report_2(n, cache: ReportCache = None, **params) -> None:
+    print_report(n, "2: Persons with the most accidents", cache, **params)
+
+def run_report_3(n, cache: ReportCache = None, **params) -> None:
+    print_report(n, "3: Insurance company exposure", cache, **params)
+
+def run_report_4(n, cache: ReportCache = None, **params) -> None:
+    print_report(n, "4: Accidents by weather risk", cache, **params)
+
+def run_report_5(n, cache: ReportCache = None, **params) -> None:
+    print_report(n, "5: Largest approved claim by company", cache, **params)
 
 def main():
     n = connect_to_neo4j()
@@ -293,22 +1053,48 @@ def main():
     result = n.execute_query("MATCH (n) RETURN count(n) AS node_count", database_="neo4j")
     node_count = result.records[0]["node_count"]
 
+    ensure_schema(n)
+    if "--backfill-weather" in sys.argv[1:]:
+        backfill_weather_categories(n, force=True)
+        n.close()
+        return
+
+    if not verify_import_plans(n):
+        print("Warning: some import queries still scan labels instead of seeking the key indexes.")
+
     perform_import = False
+    perform_delta = False
 
     if node_count > 0:
         print(f"\nDatabase currently contains {node_count} nodes.")
-        user_input = input("Delete existing data and re-import? (y/N): ").strip().lower()
+        user_input = input("Delete existing data and re-import, or import only changes? (y/d/N): ").strip().lower()
 
         if user_input == 'y':
             print("Deleting all nodes...")
-            delete_all_nodes(n)
+            delete_all_nodes(n, recreate=os.getenv("NEO4J_RECREATE_DATABASE") == "1")
             perform_import = True
+        elif user_input == 'd':
+            perform_delta = True
         else:
             print("Using existing data. Skipping import.")
     else:
         print("Database is empty. Starting fresh import.")
         perform_import = True
 
+    if perform_delta:
+        print("\n" + "=" * 40)
+        print("      STARTING DELTA IMPORT")
+        print("=" * 40)
+
+        json_data = load_json(filename="in_import_data.json")
+        remove_missing = input("Remove entities missing from the input? (y/N): ").strip().lower() == 'y'
+        delta_import(n, json_data, remove_missing=remove_missing)
+
+        mismatches = check_aggregates(n)
+        print(f"\nAggregate check: {len(mismatches)} mismatches.")
+        for mismatch in mismatches:
+            print(f"  {mismatch}")
+
     if perform_import:
         print("\n" + "=" * 40)
         print("      STARTING IMPORT PROCESS")
@@ -329,21 +1115,56 @@ def main():
             print(f"\n>>> Importing {description}...")
             func(n, json_data)
             input(f"Press Enter to proceed to next step...")
+        record_weather_rules(n)
+
+        mismatches = check_aggregates(n)
+        print(f"\nAggregate check: {len(mismatches)} mismatches.")
+        for mismatch in mismatches:
+            print(f"  {mismatch}")
 
         print("\n" + "=" * 40)
         print("      IMPORT COMPLETE")
         print("=" * 40 + "\n")
 
+    # Only reclassifies (and writes) when WEATHER_RISK_RULES changed since the accidents were classified
+    backfill_weather_categories(n)
+
     print("\n" + "=" * 40)
     print("      STARTING REPORTS")
     print("=" * 40)
-    reports = [run_report_1, run_report_2, run_report_3, run_report_4, run_report_5]
+    cache = ReportCache(directory=os.getenv("NEO4J_REPORT_CACHE_DIR"))
+    report = run_reports_concurrently(n, cache=cache)
 
-    for i, report_func in enumerate(reports, 1):
-        print(f"\n[ Report {i} ]")
-        report_func(n)
+    for title, outcome in report["results"].items():
+        print(f"\n[ Report {title} ] {outcome['latency_ms']:.1f} ms")
+        if outcome["error"] is not None:
+            print(f"Error: {outcome['error']}")
+        else:
+            print_records(title, outcome["records"], outcome["stats"])
         print("-" * 30)
 
+    print(f"\nWall time {report['wall_ms']:.1f} ms for {report['sum_ms']:.1f} ms of report latency.")
+
+    for title, report_def in REPORTS.items():
+        if report_def.get("stream"):
+            output_dir = os.getenv("NEO4J_REPORT_OUTPUT_DIR", ".")
+            os.makedirs(output_dir, exist_ok=True)
+            output = os.path.join(output_dir, f"out_report_{title.split(':')[0]}.tsv")
+            stats = stream_report(n, title, output=output)
+            first_row = f"{stats['first_row_ms']:.1f} ms" if stats["first_row_ms"] is not None else "n/a"
+            print(f"\n[ Report {title} ] streamed {stats['rows']} rows to {output}: "
+                  f"first row after {first_row}, total {stats['total_ms']:.1f} ms")
+
+    print("\n[ Query timings ]")
+    print_query_summary()
+    print("\n[ Most expensive operators ]")
+    print_operator_ranking()
+
+    print(f"\nReport query texts: {QUERY_TEXT_STATS['repeated']} repeated, {QUERY_TEXT_STATS['new']} new")
+    cache_stats = cache.stats()
+    print(f"Result cache: {cache_stats['memory_hits']} memory hits, {cache_stats['disk_hits']} disk hits, "
+          f"{cache_stats['misses']} misses")
+
     print("\n" + "=" * 40)
     print("      REPORTS ARE COMPLETE")
     print("=" * 40)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """Report results keyed on (report, report definition, parameters, graph version).
+
+    The definition (query text and columns) is part of the key, so after a report is edited a restarted
+    process does not serve pickled results of the old query. The graph version changes on every import, so entries never need invalidating: a new version
+    simply stops matching them. The memory tier is an LRU of max_entries results; with a directory,
+    results are also pickled to disk so a restarted process serves warm results for an unchanged graph.
+    """
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, version: str, key: str) -> str:
+        # Version prefix in the file name lets prune() drop whole generations without reading them
+        return os.path.join(self.directory, f"{digest(version)[:16]}-{key}.pickle")
+
+    def _switch_version(self, version: str) -> None:
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+            self.prune(version)
+
+    def get(self, title: str, definition: Dict[str, Any], params: Dict[str, Any],
+            version: str) -> Optional[List[Dict[str, Any]]]:
+        key = digest([title, definition, params])
+        with self._lock:
+            self._switch_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+        records = self._load(version, key)
+        with self._lock:
+            if records is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, records)
+            return records
+
+    def set(self, title: str, definition: Dict[str, Any], params: Dict[str, Any], version: str,
+            records: List[Dict[str, Any]]) -> None:
+        key = digest([title, definition, params])
+        with self._lock:
+            if version != self._version:
+                # The graph moved on while the report ran; this result belongs to an old version
+                return
+            self._remember(key, records)
+        if self.directory:
+            path = self._path(version, key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(records, f)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key: str, records: List[Dict[str, Any]]) -> None:
+        self._entries[key] = records
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, version: str, key: str) -> Optional[List[Dict[str, Any]]]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(version, key), "rb") as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def prune(self, version: str) -> None:
+        """Delete on-disk results of every other graph version."""
+        if not self.directory:
+            return
+        prefix = f"{digest(version)[:16]}-"
+        for name in os.listdir(self.directory):
+            if name.endswith(".pickle") and not name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,18 @@
+import csv
+import json
+from typing import Any, Callable, List, TextIO
+
+SINK_FORMATS = ("tsv", "csv", "ndjson")
+
+
+def open_sink(fmt: str, columns: List[str], stream: TextIO) -> Callable[[Any], None]:
+    """Write the header (if the format has one) and return a function that writes one record per call."""
+    if fmt in ("tsv", "csv"):
+        writer = csv.writer(stream, delimiter="\t" if fmt == "tsv" else ",", lineterminator="\n")
+        writer.writerow(columns)
+        return lambda record: writer.writerow([record[column] for column in columns])
+    if fmt == "ndjson":
+        # default=str renders Neo4j temporal and spatial values the same way the TSV output does
+        return lambda record: stream.write(
+            json.dumps({column: record[column] for column in columns}, default=str, ensure_ascii=False) + "\n")
+    raise ValueError(f"Unknown sink format '{fmt}', expected one of {', '.join(SINK_FORMATS)}")
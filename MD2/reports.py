@@ -0,0 +1,155 @@
+import math
+from typing import Dict
+
+EARTH_RADIUS_M = 6371008.8
+# "Brīvības piemineklis", Rīga
+RIGA_CENTER = (56.951, 24.113)
+
+
+def bounding_box(latitude: float, longitude: float, radius_m: float) -> Dict[str, float]:
+    """Lat/lon box that contains every point within radius_m of the center (not split at the antimeridian)."""
+    angle = radius_m / EARTH_RADIUS_M
+    lat_delta = math.degrees(angle)
+    # Widest longitude span of a spherical cap, reached north of the center's parallel
+    ratio = math.sin(angle) / max(math.cos(math.radians(latitude)), 1e-12)
+    lon_delta = math.degrees(math.asin(ratio)) if ratio < 1 else 180.0
+    return {
+        "south": max(latitude - lat_delta, -90.0),
+        "west": max(longitude - lon_delta, -180.0),
+        "north": min(latitude + lat_delta, 90.0),
+        "east": min(longitude + lon_delta, 180.0),
+    }
+
+
+# Reports 2, 3 and 5 read the aggregates md2 maintains on import (see POLICY_AGGREGATES,
+# CLAIM_AGGREGATES and the accident links) instead of traversing the whole graph; report 4 reads
+# the weather category stored at import (see weather.py) through the accident_weather_category index.
+# Every filter is a $parameter, so each report is planned once and its variations reuse the
+# cached plan. "params" maps name -> (type, default); "derive" adds parameters computed from them.
+REPORTS = {
+    "1: Accidents near a point": {
+        "query": """
+            WITH point({latitude: $latitude, longitude: $longitude}) AS centerPoint,
+                 point({latitude: $south, longitude: $west}) AS lowerLeft,
+                 point({latitude: $north, longitude: $east}) AS upperRight
+
+            MATCH (a:Accident)
+            WHERE point.withinBBox(a.location, lowerLeft, upperRight)
+              AND point.distance(a.location, centerPoint) < $radius_m
+
+            MATCH (a)-[:INVOLVED_IN]-(p:Person)
+            WHERE p.date_of_birth >= date($born_after)
+
+            MATCH (p)-[:COVERS]-(pol:Policy)-[:ISSUED]-(ic:InsuranceCompany)
+            WHERE ic.name CONTAINS $company
+
+            RETURN DISTINCT a.accident_id as AccidentID, 
+                   apoc.temporal.format(a.date,'dd MMMM yyyy HH:mm') as AccidentDate, 
+                   a.location_desc as LocationDescription, 
+                   a.weather as WeatherDescription,
+                   p.full_name as FullName,
+                   p.date_of_birth as DateOfBirth,
+                   ic.name as InsuranceCompany,
+                   round(point.distance(a.location, centerPoint)) AS DistanceFromCenter
+            ORDER BY DistanceFromCenter ASC
+        """,
+        "params": {
+            "latitude": (float, RIGA_CENTER[0]),
+            "longitude": (float, RIGA_CENTER[1]),
+            "radius_m": (float, 20000.0),
+            "born_after": (str, "1991-01-01"),
+            "company": (str, "ERGO"),
+        },
+        "derive": lambda params: bounding_box(params["latitude"], params["longitude"], params["radius_m"]),
+        "columns": ["AccidentID", "AccidentDate", "LocationDescription", "WeatherDescription", "FullName",
+                    "DateOfBirth", "InsuranceCompany", "DistanceFromCenter"],
+    },
+    "2: Persons with the most accidents": {
+        "query": """
+            MATCH (p:Person)
+            WHERE p.accident_count > 0
+            RETURN p.full_name as FullName,
+                   p.social_security_number as SocialSecurityNumber,
+                   p.accident_count AS TotalAccidents,
+                   CASE WHEN p.severity_count > 0
+                        THEN ROUND(toFloat(p.severity_sum) / p.severity_count, 2) END as AverageAccidentSeverity
+            ORDER BY TotalAccidents DESC
+            LIMIT $limit
+        """,
+        "params": {
+            "limit": (int, 5),
+        },
+        "columns": ["FullName", "SocialSecurityNumber", "TotalAccidents", "AverageAccidentSeverity"],
+    },
+    "3: Insurance company exposure": {
+        "query": """
+            MATCH (ic:InsuranceCompany)
+            WHERE ic.policy_count > 0
+            OPTIONAL MATCH (ic)-[:HAS_CLAIM_TOTAL]->(t:ClaimTotal)
+            WHERE t.status IN $statuses
+            WITH ic, SUM(COALESCE(t.amount, 0)) AS RealizedClaimCosts
+            RETURN 
+                ic.name AS InsuranceCompanyName,
+                ic.potential_liability AS PotentialLiability,
+                RealizedClaimCosts,
+                (ic.potential_liability + RealizedClaimCosts) AS TotalExposure
+            ORDER BY 
+                TotalExposure DESC
+            LIMIT $limit
+        """,
+        "params": {
+            "statuses": (list, ["approved", "pending"]),
+            "limit": (int, 5),
+        },
+        "columns": ["InsuranceCompanyName", "PotentialLiability", "RealizedClaimCosts", "TotalExposure"],
+    },
+    # No parameters: the former high_risk_terms, wet_terms and visibility_conditions overrides are
+    # gone, categories come from weather.WEATHER_RISK_RULES at import (then backfill to apply changes)
+    "4: Accidents by weather risk": {
+        "query": """
+            MATCH (a:Accident)
+            WHERE a.weather_category IS NOT NULL
+            RETURN 
+              a.weather_category AS WeatherCategory,
+              count(a) as AccidentCount,
+              round(avg(a.severity), 2) as AvgSeverity
+            ORDER BY AvgSeverity DESC
+        """,
+        "params": {},
+        "columns": ["WeatherCategory", "AccidentCount", "AvgSeverity"],
+    },
+    "5: Largest approved claim by company": {
+        "query": """
+            MATCH (t:ClaimTotal {status: $status})
+            WHERE t.max_amount IS NOT NULL
+            MATCH (ic:InsuranceCompany)-[:HAS_CLAIM_TOTAL]->(t)
+            RETURN 
+              ic.name AS InsuranceCompany,
+              MAX(t.max_amount) AS MaxClaimAmount
+            ORDER BY
+              MaxClaimAmount DESC
+            LIMIT $limit
+        """,
+        "params": {
+            "status": (str, "approved"),
+            "limit": (int, 1),
+        },
+        "columns": ["InsuranceCompany", "MaxClaimAmount"],
+    },
+    # Unbounded: one row per accident, so it is streamed to a sink instead of collected ("stream")
+    "6: Accident weather detail": {
+        "query": """
+            MATCH (a:Accident)
+            WHERE a.accident_id IS NOT NULL
+            RETURN a.accident_id AS AccidentID,
+                   a.date AS AccidentDate,
+                   a.weather AS WeatherDescription,
+                   a.severity AS Severity,
+                   a.location_desc AS LocationDescription
+            ORDER BY a.accident_id
+        """,
+        "params": {},
+        "columns": ["AccidentID", "AccidentDate", "WeatherDescription", "Severity", "LocationDescription"],
+        "stream": True,
+    },
+}
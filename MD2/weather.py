@@ -0,0 +1,22 @@
+from typing import Optional
+
+# Weather risk rules, checked in order against the lower-cased weather description: "contains"
+# matches a term anywhere in it, "equals" only the whole description. md2 stores the first matching
+# category on every accident at import (a.weather_category) and backfills the stored categories
+# on its next start after these rules change.
+WEATHER_RISK_RULES = [
+    ("High Risk", "contains", ("snow", "ice", "hail")),
+    ("Moderate Risk (Rain/Wet)", "contains", ("rain", "wet")),
+    ("Moderate Risk (Visibility/Wind)", "equals", ("fog", "dusk", "mist", "wind")),
+]
+WEATHER_DEFAULT_CATEGORY = "Low Risk (Clear/Dry)"
+
+
+def weather_category(weather: Optional[str]) -> str:
+    description = str(weather).lower() if weather is not None else ""
+    for category, match, terms in WEATHER_RISK_RULES:
+        if match == "contains" and any(term in description for term in terms):
+            return category
+        if match == "equals" and description in terms:
+            return category
+    return WEATHER_DEFAULT_CATEGORY